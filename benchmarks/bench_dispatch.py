@@ -0,0 +1,69 @@
+"""Benchmark: per-type dispatch for key lookups and key-value conversion.
+
+Compares the `isinstance` checks that `popo.key_getter` and `transformers.to_kv` used to run against the per-type
+accessors, on the people and films lists of `data/swapi.json`.
+
+Run with `pytest benchmarks/bench_dispatch.py`. Divide the mean time by `extra_info["items"]` for the per-item cost.
+"""
+import dataclasses
+import json
+import os
+from collections import abc
+
+import pytest
+
+from teddy import popo
+from teddy import transformers
+from teddy.keyed_sequence import KeyedSequence
+
+with open(os.path.join(os.path.dirname(__file__), "..", "data", "swapi.json")) as f:
+    swapi = json.load(f)
+
+
+def legacy_key_getter(key):
+    def get_key(item):
+        if isinstance(item, abc.Mapping):
+            return item[key] if key in item else None
+        if isinstance(item, abc.Sequence):
+            return item[key] if -len(item) <= key < len(item) else None
+        if dataclasses.is_dataclass(item):
+            return getattr(item, key) if hasattr(item, key) else None
+        if isinstance(item, KeyedSequence):
+            return item[key] if key in item.keys() else None
+        return None
+
+    return get_key
+
+
+def legacy_to_kv(obj):
+    if isinstance(obj, abc.Sequence):
+        return ((i, value) for i, value in enumerate(obj))
+    if isinstance(obj, abc.Mapping):
+        return ((key, value) for key, value in obj.items())
+    if isinstance(obj, KeyedSequence):
+        return obj.items()
+    if dataclasses.is_dataclass(obj):
+        return ((field.name, getattr(obj, field.name)) for field in dataclasses.fields(obj))
+    raise NotImplementedError(type(obj))
+
+
+lists = ["people", "films"]
+key_getters = [("legacy", legacy_key_getter), ("dispatch", popo.key_getter)]
+kv_converters = [("legacy", legacy_to_kv), ("dispatch", transformers.to_kv)]
+
+
+@pytest.mark.parametrize("list_name", lists)
+@pytest.mark.parametrize(("name", "key_getter"), key_getters)
+def test_key_getter(benchmark, list_name, name, key_getter):
+    items = swapi[list_name]
+    get_url = key_getter("url")
+    benchmark.extra_info["items"] = len(items)
+    benchmark(lambda: [get_url(item) for item in items])
+
+
+@pytest.mark.parametrize("list_name", lists)
+@pytest.mark.parametrize(("name", "to_kv"), kv_converters)
+def test_to_kv(benchmark, list_name, name, to_kv):
+    items = swapi[list_name]
+    benchmark.extra_info["items"] = len(items)
+    benchmark(lambda: [tuple(to_kv(item)) for item in items])
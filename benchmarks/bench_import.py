@@ -0,0 +1,48 @@
+"""Benchmark: the time of `import teddy` in a fresh interpreter.
+
+Every round starts a new `python` process that times `import teddy` (without the interpreter startup). The
+median has to stay below `TEDDY_IMPORT_BUDGET_MS` (default 150 ms), and `prettyprinter`, NumPy and asyncio must
+not be imported (they are only imported on first use, see `teddy.pretty` and `teddy.columnar.import_numpy`).
+
+Run with `pytest benchmarks/bench_import.py` (`--benchmark-json=import.json` to track the results). The times include
+compiling the sources unless their bytecode has been cached (e.g. with `PYTHONDONTWRITEBYTECODE` unset).
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+budget_ms = float(os.environ.get("TEDDY_IMPORT_BUDGET_MS", "150"))
+rounds = 7
+deferred_modules = ["prettyprinter", "numpy", "asyncio"]
+
+src = os.path.join(os.path.dirname(__file__), "..", "src")
+script = f"""
+import json, sys, time
+sys.path.insert(0, {src!r})
+start = time.perf_counter()
+import teddy
+elapsed = time.perf_counter() - start
+print(json.dumps(dict(seconds=elapsed, imported=[m for m in {deferred_modules!r} if m in sys.modules])))
+"""
+
+
+def import_teddy():
+    output = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def test_import(benchmark):
+    runs = []
+
+    def run():
+        runs.append(import_teddy())
+
+    benchmark.pedantic(run, rounds=rounds, iterations=1)
+
+    median_ms = statistics.median(run["seconds"] for run in runs) * 1e3
+    benchmark.extra_info["import_ms"] = median_ms
+    benchmark.extra_info["budget_ms"] = budget_ms
+    assert runs[-1]["imported"] == []
+    assert median_ms < budget_ms, f"import teddy took {median_ms:.1f} ms (budget: {budget_ms} ms)"
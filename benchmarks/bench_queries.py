@@ -0,0 +1,76 @@
+"""Benchmark: representative queries on `data/laaos_data.py` and `data/swapi.json`, with synthetic scale-ups.
+
+Every query runs on the datasets with their lists of records repeated `scale` times. The scales default to 1, 10 and
+100 and can be set with the environment variable `TEDDY_BENCH_SCALES` (e.g. `TEDDY_BENCH_SCALES=1,10,100,1000`).
+The peak memory of one run of the query (measured with `tracemalloc`) is reported in `extra_info["peak_memory"]`
+(bytes) next to `extra_info["records"]`.
+
+Run with `pytest benchmarks/bench_queries.py --benchmark-json=queries.json` to write the results to a JSON file.
+Two revisions can be compared with `pytest-benchmark compare before.json after.json` (or with `--benchmark-save`
+and `--benchmark-compare`).
+"""
+import json
+import os
+import tracemalloc
+
+import pytest
+
+from data import laaos_data
+from teddy import teddy, _teddy, _value
+
+with open(os.path.join(os.path.dirname(__file__), "..", "data", "swapi.json")) as f:
+    swapi = json.load(f)
+
+scales = [int(scale) for scale in os.environ.get("TEDDY_BENCH_SCALES", "1,10,100").split(",")]
+
+
+def scaled_laaos(scale):
+    return dict(laaos_data.store, iterations=laaos_data.store["iterations"] * scale)
+
+
+def scaled_swapi(scale):
+    return {key: value * scale if isinstance(value, list) else value for key, value in swapi.items()}
+
+
+# name -> (dataset, query)
+queries = {
+    "atom": (scaled_laaos, lambda t: t.iterations[-1].test_metrics.accuracy),
+    "all": (scaled_laaos, lambda t: t.iterations[:].test_metrics.accuracy),
+    "filter": (scaled_laaos, lambda t: t.iterations[_value["test_metrics"]["accuracy"] > 0.8].num_epochs),
+    "dict": (scaled_laaos, lambda t: t.iterations[:][{"epochs": "num_epochs", "metrics": "test_metrics"}]),
+    "list": (scaled_laaos, lambda t: t.iterations[:][["chosen_samples", "chosen_samples_score"]][:]),
+    "groupby": (scaled_swapi, lambda t: t.people.groupby("gender")[:][:].name),
+    "zip": (scaled_laaos, lambda t: t.iterations.zip()),
+    "pipe": (
+        scaled_laaos,
+        lambda t: t.iterations.pipe(_teddy[_value["num_epochs"] > 5], _teddy[_value["test_metrics"]["nll"] < 0.5]),
+    ),
+    "map_values": (scaled_laaos, lambda t: t.iterations[:].chosen_samples.map_values(_value + 1)),
+}
+
+
+def num_records(data):
+    return sum(len(value) for value in data.values() if isinstance(value, list))
+
+
+def peak_memory(f):
+    tracemalloc.start()
+    try:
+        f()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize("scale", scales)
+@pytest.mark.parametrize("name", list(queries))
+def test_query(benchmark, name, scale):
+    dataset, query = queries[name]
+    data = dataset(scale)
+    t = query(teddy(data))
+
+    benchmark.group = f"x{scale}"
+    benchmark.extra_info["scale"] = scale
+    benchmark.extra_info["records"] = num_records(data)
+    benchmark.extra_info["peak_memory"] = peak_memory(lambda: t.result)
+    assert benchmark(lambda: t.result) is not None
@@ -59,7 +59,8 @@ setup(
     # $ pip install -e .[dev,test]
     extras_require={
         "dev": ["check-manifest"],
-        "test": ["coverage", "codecov", "pytest", "pytest-benchmark", "pytest-cov"],
+        "columnar": ["numpy"],
+        "test": ["coverage", "codecov", "numpy", "pytest", "pytest-benchmark", "pytest-cov"],
     },
     setup_requires=["pytest-runner"],
 )
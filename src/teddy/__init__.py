@@ -1,6 +1,10 @@
 from teddy import interface
 from teddy.interface import all_keys, _key, _value, _, lit
 from teddy.dsl import teddy, _teddy
+from teddy import loader  # Registers teddy.load_json.
+from teddy import streaming  # Registers teddy.stream.
+from teddy import views  # Registers teddy.view.
+from teddy import batching  # Registers teddy.batch.
 from teddy.keyed_sequence import KeyedSequence
 
 __all__ = ["lit", "teddy", "all_keys", "_key", "_value", "_", "KeyedSequence", "_teddy"]
@@ -0,0 +1,138 @@
+"""Per-type accessors for key lookups and key-value conversion.
+
+`popo.key_getter` and `transformers.to_kv` need to decide what kind of container an object is. Instead of going
+through `isinstance` checks against `collections.abc` for every item, we resolve an `Accessor` once per concrete
+type and cache it.
+
+Custom container types can be registered with `register` (or `register_record` for namedtuples, `__slots__`
+records and attrs classes). Registrations apply to subclasses, too, and take precedence over the built-in rules.
+"""
+import dataclasses
+import typing
+from collections import abc
+
+from teddy.keyed_sequence import KeyedSequence
+
+
+@dataclasses.dataclass(frozen=True)
+class Accessor:
+    __slots__ = ("get_key", "to_kv")
+    # Returns `item[key]` or None if `key` does not exist.
+    get_key: typing.Callable[[object, object], object]
+    # Returns an iterator over (key, value) pairs.
+    to_kv: typing.Callable[[object], typing.Iterator]
+
+
+def get_mapping_key(item, key):
+    return item[key] if key in item else None
+
+
+def get_sequence_key(item, key):
+    return item[key] if -len(item) <= key < len(item) else None
+
+
+def get_dataclass_key(item, key):
+    return getattr(item, key) if hasattr(item, key) else None
+
+
+def get_keyed_sequence_key(item, key):
+    # NOTE: KeyedSequence is like a Sequence so we need to check the keys.
+    return item[key] if key in item.keys() else None
+
+
+def get_no_key(item, key):
+    return None
+
+
+def sequence_to_kv(obj):
+    return enumerate(obj)
+
+
+def mapping_to_kv(obj):
+    return iter(obj.items())
+
+
+def dataclass_to_kv(obj):
+    return ((field.name, getattr(obj, field.name)) for field in dataclasses.fields(obj))
+
+
+def no_kv(obj):
+    raise NotImplementedError(type(obj))
+
+
+_registered: typing.Dict[type, Accessor] = {}
+# Cache of resolved accessors. Only ever cleared in place, so references to it stay valid.
+resolved: typing.Dict[type, Accessor] = {}
+
+
+def register(cls: type, get_key, to_kv):
+    """Registers accessors for `cls` and its subclasses."""
+    _registered[cls] = Accessor(get_key, to_kv)
+    resolved.clear()
+
+
+def register_record(cls: type, fields: typing.Sequence[str] = None):
+    """Registers `cls` as a record whose fields are accessed as attributes.
+
+    `fields` defaults to the fields of a namedtuple, an attrs class or the `__slots__` of `cls`.
+    """
+    if fields is None:
+        if hasattr(cls, "_fields"):
+            fields = cls._fields
+        elif hasattr(cls, "__attrs_attrs__"):
+            fields = [attribute.name for attribute in cls.__attrs_attrs__]
+        elif hasattr(cls, "__slots__"):
+            fields = [cls.__slots__] if isinstance(cls.__slots__, str) else cls.__slots__
+        else:
+            raise ValueError(f"Cannot determine the fields of {cls}!")
+    fields = tuple(fields)
+    field_set = frozenset(fields)
+
+    def get_field(item, key):
+        return getattr(item, key) if key in field_set else None
+
+    def fields_to_kv(obj):
+        return ((field, getattr(obj, field)) for field in fields)
+
+    register(cls, get_field, fields_to_kv)
+
+
+def _resolve_get_key(cls):
+    # Same order as the isinstance checks used to be in `popo.key_getter`.
+    if cls is dict:
+        return dict.get
+    if issubclass(cls, abc.Mapping):
+        return get_mapping_key
+    if issubclass(cls, abc.Sequence):
+        return get_sequence_key
+    if dataclasses.is_dataclass(cls):
+        return get_dataclass_key
+    if issubclass(cls, KeyedSequence):
+        return get_keyed_sequence_key
+    return get_no_key
+
+
+def _resolve_to_kv(cls):
+    # Same order as the isinstance checks used to be in `transformers.to_kv`.
+    if issubclass(cls, abc.Sequence):
+        return sequence_to_kv
+    if issubclass(cls, (abc.Mapping, KeyedSequence)):
+        return mapping_to_kv
+    if dataclasses.is_dataclass(cls):
+        return dataclass_to_kv
+    return no_kv
+
+
+def _resolve(cls):
+    for base in cls.__mro__:
+        if base in _registered:
+            return _registered[base]
+    return Accessor(_resolve_get_key(cls), _resolve_to_kv(cls))
+
+
+def accessor(cls: type) -> Accessor:
+    """Returns the (cached) accessor for objects of type `cls`."""
+    result = resolved.get(cls)
+    if result is None:
+        result = resolved[cls] = _resolve(cls)
+    return result
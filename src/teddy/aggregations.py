@@ -0,0 +1,187 @@
+"""Aggregations over the values of a result.
+
+`t.sum()` etc. evaluate the chain of `t` with a continuation that feeds every value that reaches the end of the chain
+into an `Aggregator` and returns None, so no results are collected on the way. The values are the values of
+`t.result` with the levels that the fan-outs of the query (`[:]`, filters, `groupby` etc.) create flattened:
+`teddy(runs)[:].epochs[:].loss.sum()` sums the losses of all epochs of all runs, but `teddy([[1, 2], [3]]).count()`
+is 2. Values that are containers themselves are aggregated as they are, and Nones are skipped like in `result`.
+
+Numeric NumPy arrays (e.g. the columns of `Columns`) are aggregated with NumPy kernels, lists of numbers with the
+builtins. `popo.mapper_all` and `columnar.map_all` hand whole items (or columns) to the aggregator directly (see the
+`aggregate` tag on its continuation).
+
+NOTE: NumPy sums floats pairwise, so sums can differ from Python's `sum` in the last bits. Integer arrays whose sum
+might not fit into int64 are summed as Python ints.
+"""
+from collections import abc
+import dataclasses
+import operator
+import typing
+
+from teddy import columnar
+from teddy import keyed_sequence
+
+
+_NUMBER_TYPES = frozenset((int, float))
+# The default `init` of `reduction`.
+MISSING = object()
+# Integer sums with a float64 magnitude below this fit into int64 (with plenty of margin for rounding).
+_INT_BOUND = 2.0 ** 62
+# States of `Aggregator.pending` and the return value of its first call.
+_NOTHING = object()
+_FLUSHED = object()
+_PENDING = object()
+
+
+def _min(a, b):
+    return b if a is None or b < a else a
+
+
+def _max(a, b):
+    return b if a is None or b > a else a
+
+
+@dataclasses.dataclass(frozen=True)
+class Aggregation:
+    init: object
+    # `step(state, value)` adds a single value to the state.
+    step: typing.Callable
+    # `kernel(values)` aggregates a non-empty list of numbers or numeric NumPy array, and `combine(state, partial)`
+    # adds its result to the state. Aggregations without a kernel see every value in order.
+    kernel: typing.Optional[typing.Callable] = None
+    combine: typing.Optional[typing.Callable] = None
+    finish: typing.Callable = lambda state: state
+
+
+def _array_or_list(array_kernel, list_kernel):
+    def kernel(values):
+        if type(values) is list:
+            return list_kernel(values)
+        return array_kernel(values).item()
+
+    return kernel
+
+
+def _sum(values):
+    if type(values) is list:
+        return sum(values)
+    # Integer sums wrap around on overflow. (They are still right if the exact sum fits, as they wrap modulo 2**64.)
+    if values.dtype.kind in "iu" and not abs(values.sum(dtype=float)) < _INT_BOUND:
+        return sum(values.tolist())
+    return values.sum().item()
+
+
+SUM = Aggregation(0, operator.add, _sum, operator.add)
+COUNT = Aggregation(0, lambda count, value: count + 1, len, operator.add)
+MIN = Aggregation(None, _min, _array_or_list(lambda values: values.min(), min), _min)
+MAX = Aggregation(None, _max, _array_or_list(lambda values: values.max(), max), _max)
+MEAN = Aggregation(
+    (0, 0),
+    lambda state, value: (state[0] + value, state[1] + 1),
+    lambda values: (SUM.kernel(values), len(values)),
+    lambda state, partial: (state[0] + partial[0], state[1] + partial[1]),
+    lambda state: state[0] / state[1] if state[1] else None,
+)
+
+
+def reduction(f, init=MISSING):
+    """Returns the aggregation that folds all values with `f(state, value)` (starting from the first one by default)."""
+    if init is MISSING:
+        return Aggregation(
+            MISSING,
+            lambda state, value: value if state is MISSING else f(state, value),
+            finish=lambda state: None if state is MISSING else state,
+        )
+    return Aggregation(init, f)
+
+
+class Aggregator:
+    """The continuation of an aggregated chain (see `aggregate`)."""
+
+    __slots__ = ("aggregation", "state", "pending")
+
+    def __init__(self, aggregation: Aggregation):
+        self.aggregation = aggregation
+        self.state = aggregation.init
+        # The first value is held back until we know whether the chain fans out (see `aggregate`).
+        self.pending = _NOTHING
+
+    def add(self, value):
+        """Aggregates a single value (Nones are skipped)."""
+        if value is not None:
+            self.state = self.aggregation.step(self.state, value)
+
+    def add_values(self, values):
+        """Aggregates the values of `values` (one level deep, like `FiniteGenerator.wrap(values)` iterates them)."""
+        value_type = type(values)
+        if values is None:
+            return
+        aggregation = self.aggregation
+        if value_type is columnar.Columns:
+            for record in values:
+                self.add(record)
+        elif value_type is list or value_type is tuple or (value_type is not str and isinstance(values, abc.Sequence)):
+            if aggregation.kernel is not None and values and _NUMBER_TYPES.issuperset(map(type, values)):
+                self.state = aggregation.combine(self.state, aggregation.kernel(list(values)))
+            else:
+                for value in values:
+                    self.add(value)
+        elif value_type is dict or value_type is keyed_sequence.KeyedSequence or isinstance(values, abc.Mapping):
+            self.add_values(list(values.values()))
+        elif columnar.is_array(values):
+            if aggregation.kernel is not None and values.ndim == 1 and values.dtype.kind in "biuf":
+                if values.size:
+                    self.state = aggregation.combine(self.state, aggregation.kernel(values))
+            else:
+                for value in values:
+                    self.add(value)
+        else:
+            # Not a container, so the value itself.
+            self.add(values)
+
+    def _flush(self):
+        pending = self.pending
+        if pending is not _NOTHING and pending is not _FLUSHED:
+            self.pending = _FLUSHED
+            self.add(pending)
+
+    def __call__(self, value):
+        if self.pending is _NOTHING:
+            self.pending = value
+            return _PENDING
+        # A second value: the chain fans out.
+        self._flush()
+        self.add(value)
+
+    def aggregate(self, values):
+        """Aggregates the values of an item of a fan-out at once (see the `aggregate` tag in the module docstring)."""
+        self._flush()
+        self.pending = _FLUSHED
+        self.add_values(values)
+
+    def finish(self, returned):
+        """Aggregates the held back value given what the chain `returned`."""
+        if self.pending is _NOTHING or self.pending is _FLUSHED:
+            return
+        if returned is _PENDING:
+            # The chain passed the continuation's result through, so it didn't fan out: the value is the result.
+            pending, self.pending = self.pending, _FLUSHED
+            self.add_values(pending)
+        else:
+            self._flush()
+
+    @property
+    def result(self):
+        return self.aggregation.finish(self.state)
+
+
+def aggregate(iterable: typing.Callable, aggregation: Aggregation):
+    """Evaluates `iterable` (see `dsl.Teddy.iterable`) and aggregates all values of its result.
+
+    A chain without fan-outs calls the continuation once with the whole result and returns what the continuation
+    returns. So the first value is held back, and if the chain returns the marker of the first call, the value was the
+    result and its values are aggregated. Otherwise, it was the first of the values.
+    """
+    aggregator = Aggregator(aggregation)
+    aggregator.finish(iterable(aggregator))
+    return aggregator.result
@@ -1,6 +1,7 @@
 """A mapping that supports attributes."""
 from collections import abc
-import prettyprinter
+
+from teddy import pretty
 
 
 class AttrMapping(abc.Mapping):
@@ -23,11 +24,11 @@ class AttrMapping(abc.Mapping):
     def __getattr__(self, key):
         return self._mapping[key]
 
-    __repr__ = prettyprinter.pretty_repr
+    __repr__ = pretty.pretty_repr
     # def __repr__(self):
     #    return f"{type(self)}{tuple(self._mapping.items())}"
 
 
-@prettyprinter.register_pretty(AttrMapping)
+@pretty.register_pretty(AttrMapping)
 def repr_teddy(value, ctx):
-    return prettyprinter.pretty_call(ctx, type(value).__name__, *value._mapping.items())
+    return pretty.pretty_call(ctx, type(value).__name__, *value._mapping.items())
@@ -0,0 +1,84 @@
+"""Batch queries over many documents.
+
+`teddy.batch(sources, query, executor=executor)` runs the same query on every source (e.g. one laaos store per
+experiment run) and returns the results keyed by source. With an executor (e.g. a `ProcessPoolExecutor`), the sources
+are loaded and queried in the workers, and only the results are sent back.
+
+Paths are loaded as JSON files. (`teddy.load_json` with the query would only materialize the parts that the query
+needs, but parsing with it is slower when most of the document is needed, like for our stores. A custom `load` can
+use it.)
+
+`query` is a function that chains the query onto a Teddy (`lambda t: t.iterations[:].test_metrics`) or a zombie
+Teddy (`_teddy.iterations[:].test_metrics`). Both are compiled once per worker. For process pools, `query` has to be
+picklable, so it has to be a module-level function.
+"""
+from collections import abc
+import json
+import os
+import typing
+
+from teddy import dsl
+from teddy.keyed_sequence import KeyedSequence
+
+# id(query) -> (query, prepared query) (per process).
+_prepared = {}
+_MAX_PREPARED = 64
+
+
+def _prepare(query):
+    entry = _prepared.get(id(query))
+    if entry is None or entry[0] is not query:
+        if len(_prepared) >= _MAX_PREPARED:
+            _prepared.clear()
+        zombie = query if isinstance(query, dsl.Teddy) else query(dsl._teddy)
+        entry = _prepared[id(query)] = (query, zombie.compile())
+    return entry
+
+
+def run_query(query, load, source):
+    """Loads `source` (with `load` or as JSON file if it is a path) and returns the result of `query` for it."""
+    prepared = _prepare(query)[1]
+    if load is not None:
+        source = load(source)
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, encoding="utf-8") as f:
+            source = json.load(f)
+    return prepared(source)
+
+
+def batch(
+    sources: typing.Union[typing.Mapping, typing.Iterable],
+    query: typing.Union[typing.Callable, dsl.Teddy],
+    *,
+    executor: typing.Optional["concurrent.futures.Executor"] = None,
+    chunksize: int = 1,
+    load: typing.Optional[typing.Callable] = None,
+):
+    """Runs `query` on every source (in `executor` if given) and returns the results as `KeyedSequence`.
+
+    `sources` is a mapping from names to sources, or an iterable of sources. Sources are documents, paths of JSON
+    files or, with `load`, anything that `load` turns into a document. The results are keyed by name, or by path
+    (and by position for other sources). Sources without a result are left out, like in `result`.
+    """
+    if isinstance(sources, abc.Mapping):
+        keys, sources = list(sources.keys()), list(sources.values())
+    else:
+        sources = list(sources)
+        keys = [source if isinstance(source, (str, os.PathLike)) else i for i, source in enumerate(sources)]
+
+    # (Imported here to keep `import teddy` fast.)
+    import concurrent.futures
+
+    if isinstance(executor, concurrent.futures.ProcessPoolExecutor) and isinstance(query, dsl.Teddy):
+        raise TypeError("Zombie Teddys can't be sent to worker processes. Use a module-level function instead!")
+
+    queries = [query] * len(sources)
+    loads = [load] * len(sources)
+    if executor is None:
+        results = list(map(run_query, queries, loads, sources))
+    else:
+        results = list(executor.map(run_query, queries, loads, sources, chunksize=chunksize))
+    return KeyedSequence((key, result) for key, result in zip(keys, results) if result is not None) or None
+
+
+dsl.teddy.batch = batch
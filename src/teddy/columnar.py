@@ -0,0 +1,202 @@
+"""Columnar storage for homogeneous lists of records.
+
+`to_columns` converts lists of dicts that all have the same keys into `Columns`: one column per key instead of one
+dict per record. Columns of ints or floats are stored as NumPy arrays (if NumPy is installed), columns of records
+are stored as `Columns` again, and everything else is stored as a tuple.
+
+`Columns` is a `Sequence` of (materialized) records, so it works with all of popo. In addition, `popo.mapper_all`
+recognizes `columns[:].key` and evaluates it as a column fetch (see `map_all`) instead of looking up `key` in every
+record.
+"""
+from collections import abc
+import functools
+import importlib.util
+import sys
+import typing
+
+from teddy import keyed_sequence
+
+
+# NumPy is slow to import, so we only import it when we create arrays (see `import_numpy`). Before that, values can
+# only be arrays if someone else has imported it (see `is_array`).
+@functools.lru_cache(maxsize=None)
+def import_numpy():
+    """Imports and returns `numpy` (or returns None if it is not installed)."""
+    try:
+        import numpy
+    except ImportError:  # pragma: no cover
+        return None
+    return numpy
+
+
+@functools.lru_cache(maxsize=None)
+def has_numpy() -> bool:
+    """Whether NumPy is installed (without importing it)."""
+    return "numpy" in sys.modules or importlib.util.find_spec("numpy") is not None
+
+
+def is_array(value) -> bool:
+    """Whether `value` is a NumPy array (without importing NumPy)."""
+    numpy = sys.modules.get("numpy")
+    return numpy is not None and type(value) is numpy.ndarray
+
+
+class Columns(abc.Sequence):
+    __slots__ = ("fields", "_columns", "_length")
+    fields: tuple
+    # Maps every field to a numpy array, a `Columns` or a tuple.
+    _columns: typing.Dict[object, object]
+    _length: int
+
+    def __init__(self, columns: typing.Dict[object, object], length: int):
+        self.fields = tuple(columns)
+        self._columns = columns
+        self._length = length
+
+    @staticmethod
+    def from_records(records: typing.Sequence[dict]):
+        """Converts `records` (which need to have the same keys in the same order) into columns."""
+        fields = tuple(records[0]) if records else ()
+        columns = {field: _to_column([record[field] for record in records]) for field in fields}
+        return Columns(columns, len(records))
+
+    def column(self, field):
+        """Returns the column for `field` or None if there is no such field."""
+        return self._columns.get(field)
+
+    def take(self, indices):
+        """Returns the records at `indices` (a NumPy array of positions) as `Columns`."""
+        return Columns({field: _take(column, indices) for field, column in self._columns.items()}, len(indices))
+
+    def to_list(self):
+        """Returns the records as a list of dicts."""
+        if not self.fields:
+            return [{} for _ in range(self._length)]
+        return [
+            dict(zip(self.fields, values))
+            for values in zip(*(column_values(column) for column in self._columns.values()))
+        ]
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            columns = {field: column[index] for field, column in self._columns.items()}
+            return Columns(columns, len(range(self._length)[index]))
+        # Raises IndexError for us.
+        range(self._length)[index]
+        return {field: _column_item(column, index) for field, column in self._columns.items()}
+
+    def __iter__(self):
+        return iter(self.to_list())
+
+    def __eq__(self, other):
+        if isinstance(other, (Columns, list)):
+            return self.to_list() == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Columns({self.to_list()!r})"
+
+
+def _is_records(values: list):
+    if not values or type(values[0]) is not dict:
+        return False
+    fields = tuple(values[0])
+    return all(type(value) is dict and tuple(value) == fields for value in values)
+
+
+def _to_column(values: list):
+    if _is_records(values):
+        return Columns.from_records(values)
+
+    if values and has_numpy():
+        value_types = set(map(type, values))
+        # NOTE: we only use exact types so that converting back with `tolist` gives the same values.
+        if value_types == {float}:
+            numpy = import_numpy()
+            return numpy.array(values, dtype=numpy.float64)
+        if value_types == {int}:
+            numpy = import_numpy()
+            try:
+                return numpy.array(values, dtype=numpy.int64)
+            except OverflowError:
+                pass
+
+    return tuple(map(to_columns, values))
+
+
+def _column_item(column, index):
+    if is_array(column):
+        return column[index].item()
+    return column[index]
+
+
+def _take(column, indices):
+    if is_array(column):
+        return column[indices]
+    if type(column) is Columns:
+        return column.take(indices)
+    return tuple(map(column.__getitem__, indices.tolist()))
+
+
+def column_values(column):
+    """Returns the values of a column as a list of Python objects."""
+    if is_array(column):
+        return column.tolist()
+    if type(column) is Columns:
+        return column.to_list()
+    return list(column)
+
+
+def to_columns(data):
+    """Converts all homogeneous lists of records in `data` into `Columns`."""
+    data_type = type(data)
+    if data_type is dict:
+        return {key: to_columns(value) for key, value in data.items()}
+    if data_type is list:
+        if _is_records(data):
+            return Columns.from_records(data)
+        return list(map(to_columns, data))
+    return data
+
+
+def map_all(columns: Columns, mapper, identity, keys: typing.Sequence = None):
+    """Evaluates `columns[:]` with continuation `mapper`.
+
+    Leading key lookups in `mapper` (tagged with `column_fetch` by `popo.getitem_atom`) are evaluated as column
+    fetches. The rest of `mapper` is applied to every value of the resulting column (see `map_values`).
+    `keys` are the keys of the records (default: their positions).
+    """
+    column = columns
+    while type(column) is Columns:
+        column_fetch = getattr(mapper, "column_fetch", None)
+        if column_fetch is None:
+            break
+        key, mapper = column_fetch
+        column = column.column(key)
+        if column is None:
+            return None
+
+    aggregate = getattr(mapper, "aggregate", None)
+    if aggregate is not None:
+        return aggregate(column)
+    return map_values(range(len(columns)) if keys is None else keys, column_values(column), mapper, identity)
+
+
+def map_values(keys: typing.Sequence, values: list, mapper, identity):
+    """Returns the `KeyedSequence` of `keys` and `mapper(value)` for `values` (dropping Nones) or None if empty.
+
+    If `mapper` is `identity`, the result is built in one go.
+    """
+    if mapper is not identity:
+        values = list(map(mapper, values))
+
+    if None in values:
+        return (
+            keyed_sequence.KeyedSequence((key, value) for key, value in zip(keys, values) if value is not None) or None
+        )
+    return keyed_sequence.KeyedSequence(keys=keys, values=values) or None
@@ -0,0 +1,181 @@
+"""Compilation of Teddy chains.
+
+A Teddy chain is a sequence of popo outers: `outers[0](outers[1](...outers[-1](mapper)))`. Every outer wraps
+another closure around its continuation, so evaluating a deep chain spends most of its time in call overhead.
+
+`compile_stages` lowers a chain into a single generated function (using `exec` like `compose.compose`):
+linear stages (`getitem_atom`, `apply`, `call`) become straight-line code, `map_values`/`map_keys`/`map_kv`
+become inline loops, and fan-outs (`[:]`, filters) become nested loops that evaluate the rest of the chain
+in their body. Stages that we don't know how to lower are called as they are with the compiled rest of the
+chain as continuation.
+"""
+import functools
+
+from teddy import popo
+from teddy import transformers
+from teddy import keyed_sequence
+
+
+class _Codegen:
+    __slots__ = ("refs", "lines", "counter", "prologue")
+
+    def __init__(self):
+        self.refs = {}
+        self.lines = []
+        self.counter = 0
+        # Where to insert the setup code of opaque stages (in `builder`, before `compiled`).
+        self.prologue = 0
+
+    def ref(self, value, prefix):
+        name = f"{prefix}{len(self.refs)}"
+        self.refs[name] = value
+        return name
+
+    def var(self, prefix):
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def emit(self, depth, line):
+        self.lines.append("    " * depth + line)
+
+
+def _return_result(cg, depth, result):
+    cg.emit(depth, f"return {result}")
+
+
+def _append_result(results, key):
+    def finish(cg, depth, result):
+        value = cg.var("result")
+        cg.emit(depth, f"{value} = {result}")
+        cg.emit(depth, f"if {value} is not None:")
+        cg.emit(depth + 1, f"{results}.append(({key}, {value}))")
+
+    return finish
+
+
+def _emit_map(cg, depth, value, mapper_type, f):
+    """Emits an inline `map_values`/`map_keys`/`map_kv` loop that rebinds `value` to its result."""
+    f_ref = cg.ref(f, "f")
+    argcount = popo.getargcount(f)
+    results, k, v = cg.var("results"), cg.var("key"), cg.var("value")
+
+    if mapper_type is popo.map_values:
+        body = f"{v} = {f_ref}({v})" if argcount == 1 else f"{v} = {f_ref}({k}, {v})"
+    elif mapper_type is popo.map_keys:
+        body = f"{k} = {f_ref}({k})" if argcount == 1 else f"{k} = {f_ref}({k}, {v})"
+    else:
+        body = f"{k}, {v} = {f_ref}({k}, {v})"
+
+    cg.emit(depth, f"{results} = []")
+    cg.emit(depth, f"for {k}, {v} in to_kv({value}):")
+    cg.emit(depth + 1, body)
+    cg.emit(depth + 1, f"if {v} is not None:")
+    cg.emit(depth + 2, f"{results}.append(({k}, {v}))")
+    cg.emit(depth, f"{value} = KeyedSequence({results}) or None")
+
+
+def _emit_chain(cg, depth, stages, value, skip, finish):
+    """Emits code that evaluates `stages` on `value`.
+
+    `skip` is the statement that drops the current value (`return None` or `continue`), and `finish` emits
+    the code that handles the result of the chain.
+    """
+    for i, outer in enumerate(stages):
+        mapper_type = outer.mapper_type[1]
+        mapper_args = outer.mapper_args
+
+        if mapper_type is popo.getitem_atom or mapper_type is popo.getitem_path:
+            key_getters = (outer.key_getter,) if mapper_type is popo.getitem_atom else outer.key_getters
+            for key_getter in key_getters:
+                getter = cg.ref(key_getter, "get_key")
+                cg.emit(depth, f"{value} = {getter}({value})")
+                cg.emit(depth, f"if {value} is None:")
+                cg.emit(depth + 1, skip)
+        elif mapper_type is popo.apply and outer.executor is None:
+            f, args, kwargs = mapper_args
+            if args or kwargs:
+                f = functools.partial(f, *args, **kwargs)
+            cg.emit(depth, f"{value} = {cg.ref(f, 'f')}({value})")
+        elif mapper_type is popo.call:
+            args, kwargs = mapper_args
+            cg.emit(depth, f"{value} = {value}(*{cg.ref(args, 'args')}, **{cg.ref(kwargs, 'kwargs')})")
+        elif mapper_type in (popo.map_keys, popo.map_kv) or (mapper_type is popo.map_values and outer.executor is None):
+            _emit_map(cg, depth, value, mapper_type, mapper_args)
+            cg.emit(depth, f"if {value} is None:")
+            cg.emit(depth + 1, skip)
+        elif mapper_type is popo.mapper_all and _is_parallel(stages[i + 1 : i + 2]):
+            # Keep `[:].apply(f, executor=...)` as it is, so `mapper_all` sends all values to the executor at once.
+            _emit_opaque(cg, depth, stages[i : i + 2], stages[i + 2 :], value, finish)
+            return
+        elif mapper_type in (popo.mapper_all, popo.getitem_filter):
+            results, k, v = cg.var("results"), cg.var("key"), cg.var("value")
+            cg.emit(depth, f"{results} = []")
+            cg.emit(depth, f"for {k}, {v} in to_kv({value}):")
+            if mapper_type is popo.getitem_filter:
+                f_ref = cg.ref(mapper_args, "f")
+                if popo.getargcount(mapper_args) == 1:
+                    cg.emit(depth + 1, f"if not {f_ref}({k}):")
+                else:
+                    cg.emit(depth + 1, f"if not {f_ref}({k}, {v}):")
+                cg.emit(depth + 2, "continue")
+            _emit_chain(cg, depth + 1, stages[i + 1 :], v, "continue", _append_result(results, k))
+            finish(cg, depth, f"KeyedSequence({results}) or None")
+            return
+        else:
+            _emit_opaque(cg, depth, (outer,), stages[i + 1 :], value, finish)
+            return
+
+    finish(cg, depth, f"mapper({value})")
+
+
+def _is_parallel(stages):
+    return any(getattr(outer, "executor", None) is not None for outer in stages)
+
+
+def _emit_opaque(cg, depth, outers, stages, value, finish):
+    """Emits a call to the opaque `outers` with the compiled `stages` as continuation."""
+    inner = f"{cg.ref(_compile_builder(stages), 'rest_builder')}(mapper)"
+    for outer in reversed(outers):
+        inner = f"{cg.ref(outer, 'outer')}({inner})"
+    inner_var = cg.var("inner")
+    cg.lines.insert(cg.prologue, f"    {inner_var} = {inner}")
+    cg.prologue += 1
+    finish(cg, depth, f"{inner_var}({value})")
+
+
+def _compile_builder(stages):
+    """Returns `builder(mapper)` that returns the compiled chain with continuation `mapper`."""
+    cg = _Codegen()
+    cg.emit(0, "def builder(mapper):")
+    cg.prologue = len(cg.lines)
+    cg.emit(1, "def compiled(value0):")
+    _emit_chain(cg, 2, stages, "value0", "return None", _return_result)
+    cg.emit(1, "return compiled")
+
+    namespace = dict(cg.refs, to_kv=transformers.to_kv, KeyedSequence=keyed_sequence.KeyedSequence)
+    exec("\n".join(cg.lines), namespace)
+    return namespace["builder"]
+
+
+def flatten_stages(stages):
+    """Expands previously compiled stages, so they can be compiled together with their neighbors."""
+    flattened = []
+    for outer in stages:
+        if outer.mapper_type[1] is compile_stages:
+            flattened.extend(outer.mapper_args)
+        else:
+            flattened.append(outer)
+    return tuple(flattened)
+
+
+def compile_stages(stages):
+    """Compiles a sequence of popo outers into a single outer."""
+    stages = flatten_stages(stages)
+    builder = _compile_builder(stages)
+
+    def outer(mapper):
+        return builder(mapper)
+
+    outer.mapper_type = ("compiled", compile_stages)
+    outer.mapper_args = stages
+    return outer
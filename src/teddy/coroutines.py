@@ -0,0 +1,59 @@
+"""Running coroutine functions in Teddy chains.
+
+`amap_values(coro_fn)` and `aapply(coro_fn)` use a `CoroutineExecutor` as the executor of `map_values` and `apply`
+(see `popo.map_parallel`): all values of an item (or after `[:]`) are awaited concurrently, at most `concurrency` at
+a time, and the results are put back together with the original keys in order.
+
+The chain itself is synchronous. `await t.aresult` computes it in a worker thread, and the coroutines run on the
+caller's event loop. `t.result` runs them on a new event loop instead (so it can't be used inside a running loop).
+"""
+import asyncio
+import concurrent.futures
+import contextvars
+
+# The event loop of the current `aresult` (None outside of it).
+_event_loop = contextvars.ContextVar("teddy_event_loop", default=None)
+
+
+class CoroutineExecutor(concurrent.futures.Executor):
+    """Awaits calls of coroutine functions concurrently (at most `concurrency` at a time)."""
+
+    def __init__(self, concurrency: int = 64):
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be at least 1 (not {concurrency})!")
+        self.concurrency = concurrency
+
+    def map(self, fn, *iterables, timeout=None, chunksize=1):
+        return self._run(self._gather(fn, list(zip(*iterables))))
+
+    def submit(self, fn, *args, **kwargs):
+        future = concurrent.futures.Future()
+        try:
+            future.set_result(self._run(fn(*args, **kwargs)))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    async def _gather(self, fn, args_list):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def call(args):
+            async with semaphore:
+                return await fn(*args)
+
+        return await asyncio.gather(*(call(args) for args in args_list))
+
+    @staticmethod
+    def _run(coro):
+        loop = _event_loop.get()
+        if loop is None:
+            return asyncio.run(coro)
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+async def aresult(teddy):
+    """Computes `teddy.result` in a worker thread while its coroutines run on the current event loop."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    context.run(_event_loop.set, loop)
+    return await loop.run_in_executor(None, context.run, lambda: teddy.result)
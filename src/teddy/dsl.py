@@ -1,18 +1,64 @@
 import dataclasses
 import functools
-import prettyprinter
+import sys
 import typing
 
 from teddy import popo
+from teddy import aggregations
+from teddy import columnar as columnars
+from teddy import compiler
+from teddy import optimizer
+from teddy import profiling
 from teddy import zipper
 from teddy import attr_mapping
 from teddy import interface
+from teddy import pretty
+from teddy import schema as schemas
 
 from implicit_lambda import to_lambda
 
+id_func = popo.id_func
 
-def id_func(x):
-    return x
+# Stages that call their continuation at most once, with their whole result. Chaining onto a Teddy with only these
+# stages is the same as applying the new stage to its result.
+_LINEAR_STAGES = frozenset(
+    (
+        popo.getitem_atom,
+        popo.getitem_path,
+        popo.apply,
+        popo.call,
+        popo.map_values,
+        popo.map_kv,
+        popo.map_keys,
+        popo.index_by,
+    )
+)
+
+
+class ResultCache:
+    """Shared by a cached Teddy and all Teddys chained from it.
+
+    Invalidating it drops the cached results of all of them (for when the source object has changed).
+    """
+
+    __slots__ = ("generation",)
+
+    def __init__(self):
+        self.generation = 0
+
+    def invalidate(self):
+        self.generation += 1
+
+
+class CachedResult:
+    """The cached result of a single Teddy."""
+
+    __slots__ = ("cache", "generation", "value")
+
+    def __init__(self, cache: ResultCache):
+        self.cache = cache
+        self.generation = -1
+        self.value = None
 
 
 @dataclasses.dataclass(frozen=True)
@@ -22,33 +68,187 @@ class Teddy:
     # It returns either a value or no_value. (It does not take no_value.)
     iterable: typing.Callable
     preserve_single_index: bool
+    # `iterable` is `_source` applied to the composition of the popo outers in `_stages`.
+    # (Underscored because everything else is forwarded to `__getattr__` as a key.)
+    _source: typing.Callable
+    _stages: tuple = ()
+    # The schema of the items that the next chained outer will see (see `teddy.schema`).
+    _schema: object = schemas.ANY
+    _cached_result: typing.Optional[CachedResult] = dataclasses.field(default=None, compare=False)
 
     @property
     def result(self):
+        cached_result = self._cached_result
+        if cached_result is not None and cached_result.generation == cached_result.cache.generation:
+            return cached_result.value
+
         try:
-            return self.iterable(id_func)
+            result = self.iterable(id_func)
         except Exception:
             raise RuntimeError("Result computation error")
 
+        if cached_result is not None:
+            cached_result.value = result
+            cached_result.generation = cached_result.cache.generation
+        return result
+
+    def _aggregate(self, aggregation):
+        iterable = self._continue if self._has_linear_cache() else self.iterable
+        try:
+            return aggregations.aggregate(iterable, aggregation)
+        except Exception:
+            raise RuntimeError("Aggregation error")
+
+    def sum(self):
+        """Sums all values of the result without building it (see `teddy.aggregations`)."""
+        return self._aggregate(aggregations.SUM)
+
+    def mean(self):
+        """The mean of all values of the result (or None if there are none)."""
+        return self._aggregate(aggregations.MEAN)
+
+    def count(self):
+        """The number of values of the result."""
+        return self._aggregate(aggregations.COUNT)
+
+    def min(self):
+        return self._aggregate(aggregations.MIN)
+
+    def max(self):
+        return self._aggregate(aggregations.MAX)
+
+    def reduce(self, f, init=aggregations.MISSING):
+        """Folds all values of the result with `f(state, value)` (starting with `init` or the first value)."""
+        return self._aggregate(aggregations.reduction(f, init))
+
+    @property
+    def aresult(self):
+        """Awaitable result (for chains with `amap_values` or `aapply`, see `teddy.coroutines`)."""
+        # (Imported here because asyncio is slow to import.)
+        from teddy import coroutines
+
+        return coroutines.aresult(self)
+
     def _teddy(self, **updates):
+        if self._cached_result is not None and "_cached_result" not in updates:
+            updates["_cached_result"] = CachedResult(self._cached_result.cache)
         return dataclasses.replace(self, **updates)
 
+    def cached(self):
+        """Returns a Teddy that computes its result (and the result of every Teddy chained from it) only once.
+
+        Call `invalidate` when the source object changes.
+        """
+        return self._teddy(_cached_result=CachedResult(ResultCache()))
+
+    def invalidate(self):
+        """Drops the cached results of this Teddy and of all Teddys that share its cache."""
+        if self._cached_result is not None:
+            self._cached_result.cache.invalidate()
+
     def __iter__(self):
         return iter(self.result)
 
+    def _has_linear_cache(self):
+        """Whether continuations can start from the cached result of this Teddy (see `_LINEAR_STAGES`)."""
+        return self._cached_result is not None and all(stage.mapper_type[1] in _LINEAR_STAGES for stage in self._stages)
+
+    def _continue(self, mapper):
+        """Applies `mapper` to the (cached) result of this Teddy (see `_chain`)."""
+        result = self.result
+        if result is None:
+            # We can't tell whether the chain called its continuation with None or not at all.
+            return self.iterable(mapper)
+        return mapper(result)
+
     def _chain(self, outer):
-        return self._teddy(iterable=lambda mapper: self.iterable(outer(mapper)))
+        if self._has_linear_cache():
+            # Start from our cached result instead of evaluating the chain from the source again.
+            iterable = lambda mapper: self._continue(outer(mapper))
+        else:
+            iterable = lambda mapper: self.iterable(outer(mapper))
+        return self._teddy(
+            iterable=iterable,
+            _stages=self._stages + (outer,),
+            _schema=popo.value_schema(outer, self._schema),
+        )
 
-    def apply(self, f=None, *, args=None, kwargs=None):
+    def compile(self):
+        """Returns an equivalent Teddy whose chain has been lowered into a single generated function.
+
+        See `teddy.compiler`. Further chaining on the result works as usual (and can be compiled again).
+        For zombie Teddys (chained from `_teddy`), the result is a `PreparedQuery` that can be run on data.
+        """
+        compiled = compiler.compile_stages(self._stages)
+        source = self._source
+        if source is id_func:
+            return PreparedQuery(
+                iterable=compiled,
+                preserve_single_index=self.preserve_single_index,
+                _source=id_func,
+                _stages=(compiled,),
+                _schema=self._schema,
+            )
+        return self._teddy(iterable=lambda mapper: source(compiled(mapper)), _stages=(compiled,))
+
+    def optimize(self):
+        """Returns an equivalent Teddy whose chain has been rewritten by `teddy.optimizer` (e.g. merged lookups).
+
+        Further chaining on the result works as usual. Use `t.optimize().compile()` to compile the optimized chain.
+        """
+        stages = optimizer.optimize(self._stages)
+        source = self._source
+
+        def iterable(mapper):
+            for outer in reversed(stages):
+                mapper = outer(mapper)
+            return source(mapper)
+
+        return self._teddy(iterable=iterable, _stages=stages)
+
+    def profile(self, file=None, *, report=True) -> profiling.Profile:
+        """Computes the result with every stage timed and prints a report to `file` (default: `sys.stdout`).
+
+        Returns a `teddy.profiling.Profile` with the result and the stats of every stage. Pass `report=False` to
+        skip the report.
+        """
+        result = profiling.profile(self)
+        if report:
+            print(result.report(), file=sys.stdout if file is None else file)
+        return result
+
+    def apply(self, f=None, *, args=None, kwargs=None, executor=None, chunksize=1):
+        """Applies `f` to the items (or calls them if `f` is None).
+
+        With an `executor` (e.g. a `ProcessPoolExecutor`), `f` runs in the executor. After `[:]`, all values are
+        sent to the executor at once (in chunks of `chunksize`).
+        """
         if f is not None:
-            return self._chain(popo.apply(f, args, kwargs))
+            return self._chain(popo.apply(f, args, kwargs, executor=executor, chunksize=chunksize))
         return self._chain(popo.call(args, kwargs))
 
     def __call__(self, f=None):
         return self.apply(f)
 
-    def map_values(self, f):
-        return self._chain(popo.map_values(f))
+    def map_values(self, f, *, executor=None, chunksize=1):
+        """Maps the values of the items with `f`.
+
+        With an `executor` (e.g. a `ProcessPoolExecutor`), the values are mapped in the executor (in chunks of
+        `chunksize`), and the results are put back together with the original keys in order.
+        """
+        return self._chain(popo.map_values(f, executor=executor, chunksize=chunksize))
+
+    def amap_values(self, coro_fn, *, concurrency=64):
+        """Maps the values of the items with the coroutine function `coro_fn` (at most `concurrency` at a time)."""
+        from teddy import coroutines
+
+        return self.map_values(coro_fn, executor=coroutines.CoroutineExecutor(concurrency))
+
+    def aapply(self, coro_fn, *, args=None, kwargs=None, concurrency=64):
+        """Applies the coroutine function `coro_fn` to the items (at most `concurrency` at a time after `[:]`)."""
+        from teddy import coroutines
+
+        return self.apply(coro_fn, args=args, kwargs=kwargs, executor=coroutines.CoroutineExecutor(concurrency))
 
     def map(self, f):
         return self._chain(popo.map_kv(f))
@@ -56,6 +256,22 @@ class Teddy:
     def map_keys(self, f):
         return self._chain(popo.map_keys(f))
 
+    def index_by(self, f):
+        """Re-keys the items by `f(value)` (or `f(key, value)`) like `map_keys`, but only once.
+
+        The result (and its hash index for lookups) is kept, so later `[key]` lookups and `[_key == key]` filters
+        don't scan the items again. Appends to the items are picked up, but call `reindex` when the data has changed
+        otherwise.
+        """
+        return self._chain(popo.index_by(f))
+
+    def reindex(self):
+        """Drops the results of all `index_by` stages in this chain, so they are built again on the next use."""
+        for outer in compiler.flatten_stages(self._stages):
+            if outer.mapper_type[1] is popo.index_by:
+                outer.indexes.clear()
+        return self
+
     def zip(self, keys=interface.all_keys, *, relaxed=False):
         return self._chain(popo.zip_keys(keys, preserve_single_index=self.preserve_single_index, relaxed=relaxed))
 
@@ -89,33 +305,113 @@ class Teddy:
         if isinstance(key, Teddy):
             key = key.result
 
-        return self._chain(popo.getitem(key, preserve_single_index=self.preserve_single_index))
+        return self._chain(
+            popo.getitem(key, preserve_single_index=self.preserve_single_index, item_schema=self._schema)
+        )
 
     def __getattr__(self, key):
-        return self._chain(popo.getitem(key, preserve_single_index=self.preserve_single_index))
+        return self._chain(
+            popo.getitem(key, preserve_single_index=self.preserve_single_index, item_schema=self._schema)
+        )
 
-    __repr__ = prettyprinter.pretty_repr
+    __repr__ = pretty.pretty_repr
     # def __repr__(self):
     #    return f"{type(self)}({self.result})"
 
 
-@prettyprinter.register_pretty(Teddy)
-def repr_teddy(value, ctx):
-    try:
-        return prettyprinter.pretty_call(ctx, type(value), value.result)
-    except Exception as e:
-        return prettyprinter.pretty_call(ctx, type(value), e)
+@dataclasses.dataclass(frozen=True)
+class PreparedQuery(Teddy):
+    """A compiled zombie Teddy: `q = _teddy.iterations[:].test_metrics.compile()`.
+
+    `q(data)` returns `teddy(data).iterations[:].test_metrics.result`, and `q.map(datas)` the list of results for
+    many inputs. The chain is compiled and its mapper built only once, in `compile`.
+    Chaining on a prepared query returns a zombie Teddy again (so `map` and calls are not the DSL ones here).
+    """
+
+    _mapper: typing.Optional[typing.Callable] = dataclasses.field(default=None, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "_mapper", self.iterable(id_func))
 
+    def __call__(self, data):
+        try:
+            return self._mapper(data)
+        except Exception:
+            raise RuntimeError("Result computation error")
 
-def teddy(data=None, *, preserve_single_index=False, **kwargs):
-    if data and kwargs:
-        raise SyntaxError("teddy can either be initialized using a tuple or using keywords!")
-    data = data or kwargs
-    return Teddy(iterable=lambda mapper: mapper(data), preserve_single_index=preserve_single_index)
+    def map(self, datas: typing.Iterable) -> list:
+        mapper = self._mapper
+        try:
+            return [mapper(data) for data in datas]
+        except Exception:
+            raise RuntimeError("Result computation error")
 
+    def _teddy(self, **updates):
+        fields = {field.name: getattr(self, field.name) for field in dataclasses.fields(Teddy)}
+        return Teddy(**fields)._teddy(**updates)
 
-_teddy = Teddy(iterable=id_func, preserve_single_index=False)
 
+@pretty.register_pretty(Teddy)
+def repr_teddy(value, ctx):
+    try:
+        return pretty.pretty_call(ctx, type(value), value.result)
+    except Exception as e:
+        return pretty.pretty_call(ctx, type(value), e)
+
+
+def teddy(data=None, *, preserve_single_index=False, cache=False, schema=None, columnar=False, **kwargs):
+    """Wraps `data`.
+
+    `schema` can be a schema of `data` (see `teddy.schema.canonical_schema`), or `True` to infer it from `data`.
+    Lookups then use getters that are specialized for the schema (with a fallback when the data doesn't match).
+
+    `columnar=True` converts homogeneous lists of records in `data` into columns first (see `teddy.columnar`).
+    """
+    # NOTE: we avoid the truth value of `data`, which is ambiguous for NumPy arrays.
+    if kwargs:
+        if data is not None:
+            raise SyntaxError("teddy can either be initialized using a tuple or using keywords!")
+        data = kwargs
+    elif data is None:
+        data = {}
+    if columnar:
+        data = columnars.to_columns(data)
+    if schema is True:
+        schema = schemas.infer_schema(data)
+    elif schema is not None:
+        schema = schemas.canonical_schema(schema)
+    else:
+        schema = schemas.ANY
+    source = lambda mapper: mapper(data)
+    result = Teddy(iterable=source, preserve_single_index=preserve_single_index, _source=source, _schema=schema)
+    if cache:
+        result = result.cached()
+    return result
+
+
+def join(left, right, *, on, how="inner"):
+    """Joins the items of `left` and `right` (Teddys or data) whose keys `on` are equal.
+
+    `on` is a key (or a function of the value) for both sides, or a tuple `(left_on, right_on)`. If a key is a list
+    (e.g. a list of foreign keys), each of its entries is joined. `how` is "inner" or "left".
+    The result maps `(left_key, right_key)` to `dict(left=left_value, right=right_value)` (see `popo.hash_join`), and
+    is None if nothing matches.
+    """
+    left_on, right_on = on if isinstance(on, tuple) else (on, on)
+    hash_join = popo.hash_join(left_on, right_on, how)
+
+    def source(mapper):
+        left_data = left.result if isinstance(left, Teddy) else left
+        right_data = right.result if isinstance(right, Teddy) else right
+        result = hash_join(left_data, right_data)
+        return mapper(result) if result is not None else None
+
+    return Teddy(iterable=source, preserve_single_index=False, _source=source)
+
+
+_teddy = Teddy(iterable=id_func, preserve_single_index=False, _source=id_func)
+
+teddy.join = join
 teddy.zip = lambda data=None, *, preserve_single_index=False, **kwargs: teddy(
     data, **kwargs, preserve_single_index=preserve_single_index
 ).zip()
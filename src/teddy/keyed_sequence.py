@@ -1,8 +1,11 @@
 """A sequence that has custom indices, or a dict that behaves like a sequence."""
 from collections import abc
 import dataclasses
-import prettyprinter
+import itertools
+import operator
+import typing
 
+from teddy import pretty
 from teddy.interface import Literal, lit
 
 __all__ = ["idx", "lit", "KeyedSequence"]
@@ -22,31 +25,105 @@ def idx(row):
     return Index(row)
 
 
+_INT_TYPE = frozenset((int,))
+
+
+def _compact_keys(keys: tuple):
+    """Returns a range instead of `keys` if `keys` are consecutive ints (e.g. for results derived from lists)."""
+    if not keys or type(keys[0]) is not int:
+        return keys
+    start = keys[0]
+    stop = start + len(keys)
+    if (
+        keys[-1] != stop - 1
+        or not _INT_TYPE.issuperset(map(type, keys))
+        or not all(map(operator.eq, keys, itertools.count(start)))
+    ):
+        return keys
+    return range(start, stop)
+
+
+_second = operator.itemgetter(1)
+
+
+def _same_keys(keys, other_keys):
+    if type(keys) is type(other_keys):
+        return keys == other_keys
+    return len(keys) == len(other_keys) and tuple(keys) == tuple(other_keys)
+
+
 class KeyedSequence(abc.Collection):
-    __slots__ = ("_mapping", "_keys", "_values")
-    _mapping: dict
-    _keys: tuple
+    # Keys and values are stored once. The index from keys to positions is only built when a key lookup needs it.
+    # Consecutive int keys (as for lists) are stored as a range and looked up using index arithmetic.
+    __slots__ = ("_keys", "_values", "_index")
+    _keys: typing.Union[tuple, range]
     _values: tuple
+    _index: dict
 
     def __init__(self, mapping=None, *, keys=None, values=None, **kwargs):
-        # NOTE: need to initialize the fields in case dict(mapping) throws.
-        self._mapping = {}
+        # NOTE: need to initialize the fields in case the construction throws.
         self._keys = ()
         self._values = ()
+        self._index = None
+
+        if values is not None:
+            self._values = tuple(values)
+            if keys is None:
+                self._keys = range(len(self._values))
+            else:
+                # Keys are assumed to be unique.
+                self._keys = keys if type(keys) is range else tuple(keys)
+            return
+
+        if type(mapping) is enumerate:
+            # The keys are consecutive ints, so they don't need to be deduplicated.
+            first = next(mapping, None)
+            if first is not None:
+                self._values = (first[1], *map(_second, mapping))
+                self._keys = range(first[0], first[0] + len(self._values))
+            return
 
         mapping = mapping or kwargs
 
+        if isinstance(mapping, KeyedSequence):
+            self._keys = mapping._keys
+            self._values = mapping._values
+            self._index = mapping._index
+            return
+
         if not isinstance(mapping, dict):
+            # NOTE: the temporary dict deduplicates keys (the first occurrence determines the position, the last one
+            # the value), and it is the fastest way to split the pairs into keys and values.
             mapping = dict(mapping)
-        self._mapping = mapping
-
-        if keys is None:
-            keys = mapping.keys()
-        if values is None:
-            values = mapping.values()
+        self._keys = _compact_keys(tuple(mapping.keys()))
+        self._values = tuple(mapping.values())
 
-        self._keys = tuple(keys)
-        self._values = tuple(values)
+    @classmethod
+    def _wrap(cls, keys, values):
+        """Returns a KeyedSequence that stores `keys` and `values` as they are (without copying them).
+
+        `values` needs to be an immutable sequence that compares equal to the tuple of its values, and `keys` a range
+        or such a sequence with unique keys of the same length.
+        """
+        result = cls.__new__(cls)
+        result._keys = keys
+        result._values = values
+        result._index = None
+        return result
+
+    def _get_index(self):
+        index = self._index
+        if index is None:
+            index = self._index = dict(zip(self._keys, range(len(self._keys))))
+        return index
+
+    def _find(self, key):
+        """Returns the position of `key` or -1."""
+        keys = self._keys
+        if type(keys) is range and type(key) is int:
+            position = key - keys.start
+            return position if 0 <= position < len(keys) else -1
+        return self._get_index().get(key, -1)
 
     def __iter__(self):
         return iter(self._values)
@@ -59,7 +136,10 @@ class KeyedSequence(abc.Collection):
             return self._values[key.index]
         if isinstance(key, Literal):
             key = key.value
-        return self._mapping[key]
+        position = self._find(key)
+        if position < 0:
+            raise KeyError(key)
+        return self._values[position]
 
     def keys(self):
         return KeysView(self)
@@ -71,13 +151,14 @@ class KeyedSequence(abc.Collection):
         return value in self._values
 
     def __reversed__(self):
-        return KeyedSequence(self._mapping, keys=tuple(reversed(self._keys)), values=tuple(reversed(self._values)))
+        return KeyedSequence(keys=tuple(reversed(self._keys)), values=tuple(reversed(self._values)))
 
     def items(self):
         return ItemsView(self)
 
     def get(self, key, default=None):
-        return self[key] if key in self._keys else default
+        position = self._find(key)
+        return default if position < 0 else self._values[position]
 
     def index(self, value):
         return self._keys[self._values.index(value)]
@@ -87,24 +168,24 @@ class KeyedSequence(abc.Collection):
 
     def __eq__(self, other):
         if isinstance(other, KeyedSequence):
-            return self._keys == other._keys and self._values == other._values
+            return _same_keys(self._keys, other._keys) and self._values == other._values
         if isinstance(other, dict):
-            return self._keys == tuple(other.keys()) and self._values == tuple(other.values())
+            return _same_keys(self._keys, tuple(other.keys())) and self._values == tuple(other.values())
         if isinstance(other, (tuple, list)):
             return self._values == tuple(other)
         return super().__eq__(other)
 
     def __hash__(self):
-        return hash((self._keys, self._values))
+        return hash((tuple(self._keys), self._values))
 
-    __repr__ = prettyprinter.pretty_repr
+    __repr__ = pretty.pretty_repr
     # def __repr__(self):
-    #    return f"{type(self)}{tuple(self._mapping.items())}"
+    #    return f"{type(self)}{tuple(self.items())}"
 
 
-@prettyprinter.register_pretty(KeyedSequence)
+@pretty.register_pretty(KeyedSequence)
 def repr_teddy(value, ctx):
-    return prettyprinter.pretty_call(ctx, "KeyedSequence", *value._mapping.items())
+    return pretty.pretty_call(ctx, "KeyedSequence", *zip(value._keys, value._values))
 
 
 class MappingView(abc.Sized):
@@ -116,12 +197,12 @@ class MappingView(abc.Sized):
     def __len__(self):
         return len(self._mapping)
 
-    __repr__ = prettyprinter.pretty_repr
+    __repr__ = pretty.pretty_repr
 
 
-@prettyprinter.register_pretty(MappingView)
+@pretty.register_pretty(MappingView)
 def repr_teddy(value, ctx):
-    return prettyprinter.pretty_call(ctx, type(value), *value._mapping._mapping.items())
+    return pretty.pretty_call(ctx, type(value), *zip(value._mapping._keys, value._mapping._values))
 
 
 class KeysView(MappingView, abc.Set):
@@ -133,7 +214,7 @@ class KeysView(MappingView, abc.Set):
         return set(it)
 
     def __contains__(self, key):
-        return key in self._mapping._keys
+        return self._mapping._find(key) >= 0
 
     def __iter__(self):
         return iter(self._mapping._keys)
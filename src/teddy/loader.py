@@ -0,0 +1,325 @@
+"""Projection-pushdown JSON loading.
+
+`load_json(source, *queries)` only materializes the parts of a JSON document that `queries` can touch. The
+projection of a query is derived from its popo stages (see `projection`): key lookups and `[:]` narrow down what
+is needed, and everything that we can't look into (`apply`, `map_values`, ...) needs the whole value.
+
+Arrays and objects that lead to arrays (like the document itself) are walked one value at a time, so unneeded values
+are skipped right away (by their brackets, without building them). Objects below that (e.g. the records of an array)
+are parsed as a whole (which is much faster) and pruned. Object keys that are not needed are left out, and array
+elements that are not needed are replaced by None, so indices stay the same.
+
+NOTE: the parser works on the whole text of the document, so `load_json` reads the file into memory first. The
+projection saves building the Python objects for the unneeded parts, not reading them. For logs that don't fit into
+memory, write JSON Lines and use `teddy.stream`.
+"""
+
+import dataclasses
+import json
+import json.decoder
+import os
+import re
+import typing
+
+from teddy import compiler
+from teddy import dsl
+from teddy import popo
+
+
+# The whole value is needed.
+FULL = None
+# The value is not needed.
+SKIP = object()
+
+
+@dataclasses.dataclass(frozen=True)
+class Projection:
+    # Projections of the values for specific keys.
+    keys: typing.Dict[object, object]
+    # The projection of the values for all other keys.
+    others: object
+    # Whether an array below has to be walked (see `_parse`).
+    fans_out: bool = dataclasses.field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        fans_out = self.others is not SKIP or any(
+            value is not SKIP and value is not FULL and value.fans_out for value in self.keys.values()
+        )
+        object.__setattr__(self, "fans_out", fans_out)
+
+
+def _merge(a, b):
+    if a is SKIP:
+        return b
+    if b is SKIP:
+        return a
+    if a is FULL or b is FULL:
+        return FULL
+    keys = dict(a.keys)
+    for key, value in b.keys.items():
+        keys[key] = _merge(_get(a, key), value)
+    for key in a.keys.keys() - b.keys.keys():
+        keys[key] = _merge(keys[key], b.others)
+    return Projection(keys, _merge(a.others, b.others))
+
+
+def _get(projection, key):
+    return projection.keys.get(key, projection.others)
+
+
+def _lookup(key, rest):
+    if type(key) is str or (type(key) is int and key >= 0):
+        return Projection({key: rest}, SKIP)
+    # E.g. negative indices, which depend on the length of the array.
+    return FULL
+
+
+def _project(stages):
+    if not stages:
+        return FULL
+
+    outer, stages = stages[0], stages[1:]
+    mapper_type = outer.mapper_type[1]
+    mapper_args = outer.mapper_args
+
+    if mapper_type is popo.getitem_atom or mapper_type is popo.getitem_atom_preserve_single_value:
+        return _lookup(mapper_args, _project(stages))
+    if mapper_type is popo.getitem_path:
+        projection = _project(stages)
+        for key in reversed(mapper_args):
+            projection = _lookup(key, projection)
+        return projection
+    if mapper_type is popo.mapper_all:
+        return Projection({}, _project(stages))
+    if mapper_type is popo.getitem_filter and popo.getargcount(mapper_args) == 1:
+        # Filters on keys only.
+        return Projection({}, _project(stages))
+    if mapper_type is popo.getitem_dict or mapper_type is popo.getitem_list:
+        keys = mapper_args.values() if mapper_type is popo.getitem_dict else mapper_args
+        rest = _project(stages)
+        projection = SKIP
+        for key in keys:
+            # NOTE: `_lookup` returns FULL for other keys (lists, filters, ...), which we don't look into.
+            projection = _merge(projection, _lookup(key, rest))
+        return projection
+    if mapper_type is popo.getitem_dataclass:
+        rest = _project(stages)
+        return Projection({field.name: rest for field in dataclasses.fields(mapper_args)}, SKIP)
+    if mapper_type is compiler.compile_stages:
+        return _project(tuple(mapper_args) + stages)
+    return FULL
+
+
+def projection(*queries):
+    """Returns the projection of the data that `queries` (Teddys) can touch."""
+    result = SKIP
+    for query in queries:
+        result = _merge(result, _project(query._stages))
+    return result
+
+
+_whitespace = json.decoder.WHITESPACE
+_scan_once = json.JSONDecoder().scan_once
+_scanstring = json.decoder.scanstring
+# Everything up to the next bracket that is not in a string.
+_skip_flat = re.compile(r'(?:[^\[\]{}"]+|"[^"\\]*(?:\\.[^"\\]*)*")*')
+# Drops everything but quotes and brackets, and makes all brackets square.
+_brackets = bytes.maketrans(b"{}", b"[]"), bytes(set(range(256)) - set(b'[]{}"'))
+
+
+def _prune(value, projection):
+    """Returns the projection of an already parsed value."""
+    if projection is FULL:
+        return value
+    value_type = type(value)
+    if value_type is dict:
+        if projection.others is SKIP:
+            result = {}
+            for key, sub in projection.keys.items():
+                if key in value:
+                    result[key] = value[key] if sub is FULL else _prune(value[key], sub)
+            return result
+        subs = ((key, sub_value, _get(projection, key)) for key, sub_value in value.items())
+        return {key: _prune(sub_value, sub) for key, sub_value, sub in subs if sub is not SKIP}
+    if value_type is list:
+        subs = ((sub_value, _get(projection, index)) for index, sub_value in enumerate(value))
+        return [None if sub is SKIP else _prune(sub_value, sub) for sub_value, sub in subs]
+    return value
+
+
+def _close(s, idx, depth):
+    """Returns the end of the `depth` arrays and objects that are open at `idx`.
+
+    We only look at the brackets and quotes of `s`, a chunk at a time and with bytes operations, which is much faster
+    than matching strings (let alone building values). Once the brackets of a string are dropped, it becomes `""`,
+    and once all `[]` are dropped, we are left with the brackets that close (and open) something outside of the chunk.
+    This is only right if no string contains brackets (or escapes), so we fall back to `_close_exactly` otherwise. (And
+    skipped values are not validated.)
+    """
+    start, start_depth = idx, depth
+    open_string = b""
+    size = 4096
+    while True:
+        chunk = s[idx : idx + size].encode("ascii", "replace")
+        if not chunk or b"\\" in chunk:
+            return _close_exactly(s, start, start_depth)
+        brackets = open_string + chunk.translate(*_brackets)
+        if brackets.count(b'"') % 2:
+            # The chunk ends in a string.
+            last = brackets.rfind(b'"')
+            brackets, open_string = brackets[:last], brackets[last:]
+        else:
+            open_string = b""
+        brackets = brackets.replace(b'""', b"")
+        if b'"' in brackets or b"[" in open_string or b"]" in open_string:
+            return _close_exactly(s, start, start_depth)
+        while b"[]" in brackets:
+            brackets = brackets.replace(b"[]", b"")
+        closing = len(brackets) - len(brackets.lstrip(b"]"))
+        if closing >= depth:
+            break
+        depth += len(brackets) - 2 * closing
+        idx += size
+        size = min(4 * size, 65536)
+
+    # The last bracket is in this chunk, outside of strings. We step from closing bracket to closing bracket.
+    end = idx + size
+    while depth:
+        close = s.find("]", idx, end)
+        curly = s.find("}", idx, end if close < 0 else close)
+        if curly >= 0:
+            close = curly
+        depth += s.count("[", idx, close) + s.count("{", idx, close) - 1
+        idx = close + 1
+    return idx
+
+
+def _close_exactly(s, idx, depth):
+    """Like `_close`, but matches strings, too."""
+    while depth:
+        idx = _skip_flat.match(s, idx).end()
+        char = s[idx]
+        if char == "[" or char == "{":
+            depth += 1
+        elif char == "]" or char == "}":
+            depth -= 1
+        else:
+            raise json.JSONDecodeError("Unterminated string", s, idx)
+        idx += 1
+    return idx
+
+
+def _skip(s, idx):
+    """Returns the end of the value at `idx` (see `_close` for arrays and objects)."""
+    char = s[idx]
+    if char == "[" or char == "{":
+        try:
+            # Small values are faster to parse (in C) than to skip. (If they end within the slice, it doesn't matter
+            # that we cut `s` there.)
+            return idx + _scan_once(s[idx : idx + 1024], 0)[1]
+        except (StopIteration, json.JSONDecodeError):
+            return _close(s, idx + 1, 1)
+    return _scan_once(s, idx)[1]
+
+
+def _expect(s, idx, char):
+    idx = _whitespace.match(s, idx).end()
+    if s[idx : idx + 1] != char:
+        raise json.JSONDecodeError(f"Expecting {char!r}", s, idx)
+    return idx + 1
+
+
+def _parse(s, idx, projection, walk=False):
+    """Returns the (projected) value at `idx` and its end.
+
+    Objects are walked key by key if `walk` is True or `projection` fans out (to some array). Otherwise, they are
+    small enough to be parsed as a whole (which is much faster) and pruned afterwards. Arrays are walked unless all
+    of their elements are parsed as a whole anyway.
+    """
+    if projection is FULL:
+        return _scan_once(s, idx)
+
+    char = s[idx]
+    if char == "{":
+        if not walk and not projection.fans_out:
+            value, idx = _scan_once(s, idx)
+            return _prune(value, projection), idx
+
+        result = {}
+        idx = _whitespace.match(s, idx + 1).end()
+        if s[idx] == "}":
+            return result, idx + 1
+        while True:
+            key, idx = _scanstring(s, _expect(s, idx, '"'))
+            idx = _whitespace.match(s, _expect(s, idx, ":")).end()
+            value_projection = _get(projection, key)
+            if value_projection is SKIP:
+                idx = _skip(s, idx)
+            else:
+                result[key], idx = _parse(s, idx, value_projection)
+            idx = _whitespace.match(s, idx).end()
+            if s[idx] == "}":
+                return result, idx + 1
+            idx = _whitespace.match(s, _expect(s, idx, ",")).end()
+
+    if char == "[":
+        others = projection.others
+        if not projection.keys and others is not SKIP and (others is FULL or not others.fans_out):
+            # All elements are parsed as a whole anyway.
+            value, idx = _scan_once(s, idx)
+            return [_prune(sub_value, others) for sub_value in value], idx
+
+        result = []
+        idx = _whitespace.match(s, idx + 1).end()
+        if s[idx] == "]":
+            return result, idx + 1
+        while True:
+            value_projection = _get(projection, len(result))
+            if value_projection is SKIP:
+                idx = _skip(s, idx)
+                result.append(None)
+            else:
+                value, idx = _parse(s, idx, value_projection)
+                result.append(value)
+            idx = _whitespace.match(s, idx).end()
+            if s[idx] == "]":
+                return result, idx + 1
+            idx = _whitespace.match(s, _expect(s, idx, ",")).end()
+
+    return _scan_once(s, idx)
+
+
+def loads_json(s: str, *queries):
+    """Parses the JSON document `s`, but only the parts that `queries` can touch."""
+    idx = _whitespace.match(s, 0).end()
+    value_projection = projection(*queries)
+    try:
+        if value_projection is SKIP:
+            result, idx = None, _skip(s, idx)
+        else:
+            # The document itself is always walked, as it might be large.
+            result, idx = _parse(s, idx, value_projection, walk=True)
+    except StopIteration as err:
+        raise json.JSONDecodeError("Expecting value", s, err.value) from None
+    except IndexError:
+        # We index `s` without bounds checks, so truncated documents run past its end.
+        raise json.JSONDecodeError("Unexpected end of data", s, len(s)) from None
+    if _whitespace.match(s, idx).end() != len(s):
+        raise json.JSONDecodeError("Extra data", s, idx)
+    return result
+
+
+def load_json(source, *queries):
+    """Loads the JSON document `source` (a path or a file object), but only the parts that `queries` can touch.
+
+    For example, `load_json("swapi.json", _teddy.people[:].name)` only loads the names of all people.
+
+    The whole file is read into a string before it is parsed (see the module docstring).
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, encoding="utf-8") as f:
+            return loads_json(f.read(), *queries)
+    return loads_json(source.read(), *queries)
+
+
+dsl.teddy.load_json = load_json
@@ -0,0 +1,140 @@
+"""Rule-based optimization of Teddy chains.
+
+`optimize(stages)` rewrites the popo outers of a chain (see `Teddy._stages` and their `mapper_type`/`mapper_args`
+tags) into an equivalent chain with fewer or cheaper stages. The rules are applied until none matches:
+
+* `.map_values(f).map_values(g)` becomes a single `map_values`.
+* `.map_values(f)[p]` for a filter `p` on keys only becomes a `map_values` that skips the keys that don't pass `p`
+  (so `f` is only called for them), followed by `[:]`.
+* Chained lookups `.a.b` become a single `getitem_path` lookup, and lookups after `[{name: key, ...}]` are merged into
+  the lookups of its entries.
+* `[:]` at the end of a chain is dropped after stages that return a `KeyedSequence` without Nones anyway (like
+  `map_values`), when nothing else is chained after it.
+
+NOTE: the rules assume that the functions in the chain have no side effects. For example, `p` above is also called
+for keys whose mapped value is None.
+"""
+import typing
+
+from teddy import popo
+
+
+def _is(outer, *mapper_types):
+    return outer.mapper_type[1] in mapper_types
+
+
+def _kv_function(f):
+    if popo.getargcount(f) == 1:
+        return lambda key, value: f(value)
+    return f
+
+
+def _is_sequential(outer):
+    return getattr(outer, "executor", None) is None
+
+
+def _merge_map_values(first, second):
+    if not (_is(first, popo.map_values) and _is(second, popo.map_values)):
+        return None
+    if not (_is_sequential(first) and _is_sequential(second)):
+        return None
+    f = _kv_function(first.mapper_args)
+    g = _kv_function(second.mapper_args)
+
+    def map_value(key, value):
+        value = f(key, value)
+        if value is None:
+            return None
+        return g(key, value)
+
+    return (popo.map_values(map_value),)
+
+
+def _push_key_filter(first, second):
+    if not (_is(first, popo.map_values) and _is(second, popo.getitem_filter)) or not _is_sequential(first):
+        return None
+    predicate = second.mapper_args
+    if popo.getargcount(predicate) != 1:
+        return None
+    f = _kv_function(first.mapper_args)
+
+    def map_value(key, value):
+        return f(key, value) if predicate(key) else None
+
+    # `map_values` drops the keys that don't pass, and `[:]` applies the rest of the chain to each value.
+    return popo.map_values(map_value), popo.mapper_all
+
+
+def _path(outer):
+    if _is(outer, popo.getitem_atom):
+        return (outer.mapper_args,), (outer.key_getter,)
+    if _is(outer, popo.getitem_path):
+        return outer.mapper_args, outer.key_getters
+    return None
+
+
+def _merge_lookups(first, second):
+    second_path = _path(second)
+    if second_path is None:
+        return None
+
+    first_path = _path(first)
+    if first_path is not None:
+        return (popo.getitem_path(first_path[0] + second_path[0], first_path[1] + second_path[1]),)
+
+    if _is(first, popo.getitem_dict):
+        sub_paths = [(name, _path(sub_outer)) for name, sub_outer in first.sub_outers]
+        if any(sub_path is None for name, sub_path in sub_paths):
+            return None
+        sub_outers = [
+            (name, popo.getitem_path(keys + second_path[0], key_getters + second_path[1]))
+            for name, (keys, key_getters) in sub_paths
+        ]
+        return (popo.getitem_dict(first.mapper_args, sub_outers=sub_outers),)
+
+    return None
+
+
+def without_trailing_all(stage):
+    """`stage[:]` that skips the `[:]` if its continuation is the identity (see `popo.id_func`)."""
+
+    def outer(mapper):
+        if mapper is popo.id_func:
+            return stage(mapper)
+        return stage(popo.mapper_all(mapper))
+
+    outer.mapper_type = ("without_trailing_all", without_trailing_all)
+    outer.mapper_args = stage
+    return outer
+
+
+def _drop_trailing_all(first, second):
+    # These stages return a `KeyedSequence` without Nones (or None), which `[:]` would only copy.
+    if _is(first, popo.map_values, popo.map_kv, popo.map_keys, popo.groupby) and _is(second, popo.mapper_all):
+        return (without_trailing_all(first),)
+    return None
+
+
+_rules = (_merge_map_values, _push_key_filter, _merge_lookups)
+
+
+def optimize(stages: typing.Sequence) -> tuple:
+    """Returns the optimized chain for the popo outers `stages`."""
+    stages = list(stages)
+    i = 0
+    while i < len(stages) - 1:
+        for rule in _rules:
+            replacement = rule(stages[i], stages[i + 1])
+            if replacement is not None:
+                stages[i : i + 2] = replacement
+                # The replacement might match with the previous stage now.
+                i = max(i - 1, 0)
+                break
+        else:
+            i += 1
+
+    if len(stages) >= 2:
+        replacement = _drop_trailing_all(stages[-2], stages[-1])
+        if replacement is not None:
+            stages[-2:] = replacement
+    return tuple(stages)
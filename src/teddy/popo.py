@@ -1,37 +1,97 @@
 """POPO: Plain-old Python object
 
 Implementation details for handling POPOs.
+
+Every `outer` returned from here is tagged with `mapper_type` and `mapper_args` (unconditionally,
+unlike the `__debug__` tags on `inner`), so chains of outers can be inspected and compiled.
 """
 import dataclasses
 import functools
 import itertools
+import math
+import operator
 import typing
 import inspect
-from collections import abc
+import types
 
+from teddy import accessors
+from teddy import columnar
 from teddy import transformers
 from teddy import interface
 from teddy import keyed_sequence
+from teddy import schema
+from teddy import vectorize
 from teddy import zipper
 
-from implicit_lambda import to_lambda, is_lambda_dsl
+from implicit_lambda import to_lambda, is_lambda_dsl, get_expr
 from implicit_lambda import args_resolver
+from implicit_lambda.details import expression
+
+
+def id_func(x):
+    return x
+
+
+# The loop body for each kind of step (see `transformers._step`).
+_step_code = {
+    "filter_keys": "if not {f}(key): continue",
+    "filter_values": "if not {f}(value): continue",
+    "filter": "if not {f}(key, value): continue",
+    "map_keys": "key = {f}(key)",
+    "map_values": "value = {f}(value)",
+    "map_kv": "key, value = {f}(key, value)",
+    "call_values": "value = value(*{f})",
+    "drop_nones": "if value is None: continue",
+}
+_fused_loops = {}
+
+
+def _fused_loop(kinds: tuple, collect: bool):
+    """Returns `loop(pairs, *fs)` that applies the steps `kinds` (with functions `fs`) to each pair in one loop.
+
+    The loop yields the resulting pairs or, if `collect` is True, returns them as a dict.
+    """
+    loop = _fused_loops.get((kinds, collect))
+    if loop is None:
+        fs = [f"f{i}" for i in range(len(kinds))]
+        lines = [f"def loop(pairs, {', '.join(fs)}):"]
+        if collect:
+            lines.append("    results = {}")
+        lines.append("    for key, value in pairs:")
+        lines.extend("        " + _step_code[kind].format(f=f) for kind, f in zip(kinds, fs))
+        lines.append("        results[key] = value" if collect else "        yield key, value")
+        if collect:
+            lines.append("    return results")
+        namespace = {}
+        exec("\n".join(lines), namespace)
+        loop = _fused_loops[(kinds, collect)] = namespace["loop"]
+    return loop
 
 
-@dataclasses.dataclass(frozen=True)
 class FiniteGenerator:
-    __slots__ = ("generator_lambda",)
-    generator_lambda: typing.Callable[[], typing.Generator]
+    """Key-value pairs with a chain of adapters (filters and maps) that are applied lazily.
+
+    Transformers from `teddy.transformers` are recorded as `steps` and run fused: every pair passes through one loop
+    that does all the filtering and mapping (see `_fused_loop`) instead of one generator per adapter. Other
+    transformers (generator -> generator) wrap the pairs as they are.
+    """
+
+    __slots__ = ("generator_lambda", "steps")
+    generator_lambda: typing.Callable[[], typing.Iterator]
+    # Pairs of kind and function (or the transformer itself for kind None).
+    steps: tuple
+
+    def __init__(self, generator_lambda, steps=()):
+        self.generator_lambda = generator_lambda
+        self.steps = steps
 
     @staticmethod
     def wrap(obj: object):
         return FiniteGenerator(lambda: transformers.to_kv(obj))
 
-    def adapt(self, transformers: callable):
-        new_generator = FiniteGenerator(lambda: transformers(self.generator_lambda()))
-        if __debug__:
-            new_generator.generator_lambda.previous = self.generator_lambda
-        return new_generator
+    def adapt(self, transformer: callable):
+        step = getattr(transformer, "step", None) or (None, transformer)
+        return FiniteGenerator(self.generator_lambda, self.steps + (step,))
 
     def filter_keys(self, f):
         return self.adapt(transformers.filter_keys(f))
@@ -57,35 +117,91 @@ class FiniteGenerator:
     def drop_nones(self):
         return self.adapt(transformers.drop_nones)
 
+    def _run(self, collect: bool):
+        """Runs all steps (see `_fused_loop`) on the pairs."""
+        pairs = self.generator_lambda()
+        kinds, fs = [], []
+        for kind, f in self.steps:
+            if kind is not None:
+                kinds.append(kind)
+                fs.append(f)
+                continue
+            if kinds:
+                pairs = _fused_loop(tuple(kinds), False)(pairs, *fs)
+                kinds, fs = [], []
+            pairs = f(pairs)
+        if collect:
+            return _fused_loop(tuple(kinds), True)(pairs, *fs)
+        if kinds:
+            return _fused_loop(tuple(kinds), False)(pairs, *fs)
+        return iter(pairs)
+
     def __iter__(self):
-        return self.generator_lambda()
+        return self._run(collect=False)
 
     @property
     def result(self):
-        return keyed_sequence.KeyedSequence(iter(self))
+        return keyed_sequence.KeyedSequence(self._run(collect=True))
 
     @property
     def result_or_none(self):
         return self.drop_nones().result or None
 
 
-def key_getter(key):
+def key_getter(key, item_schema=schema.ANY):
+    resolved_accessors = accessors.resolved
+
     def get_key(item):
-        if isinstance(item, abc.Mapping):
-            return item[key] if key in item else None
-        if isinstance(item, abc.Sequence):
-            return item[key] if -len(item) <= key < len(item) else None
-        if dataclasses.is_dataclass(item):
-            return getattr(item, key) if hasattr(item, key) else None
-        if isinstance(item, keyed_sequence.KeyedSequence):
-            # NOTE: KeyedSequence is like a Sequence so we need to check the keys.
-            return item[key] if key in item.keys() else None
-        return None
+        item_accessor = resolved_accessors.get(type(item))
+        if item_accessor is None:
+            item_accessor = accessors.accessor(type(item))
+        return item_accessor.get_key(item, key)
+
+    # Specialized getters guard on the exact type from the schema and fall back to `get_key` otherwise.
+    item_type = getattr(item_schema, "type", None)
+
+    if isinstance(item_schema, schema.DictSchema):
+
+        def get_dict_key(item):
+            if type(item) is item_type:
+                return item.get(key)
+            return get_key(item)
+
+        return get_dict_key
+
+    if isinstance(item_schema, schema.SequenceSchema) and type(key) is int:
+
+        def get_index(item):
+            if type(item) is item_type:
+                return item[key] if -len(item) <= key < len(item) else None
+            return get_key(item)
+
+        return get_index
+
+    if isinstance(item_schema, schema.DataclassSchema) and key in item_schema.fields:
+        get_attr = operator.attrgetter(key)
+
+        def get_field(item):
+            if type(item) is item_type:
+                return get_attr(item)
+            return get_key(item)
+
+        return get_field
 
     return get_key
 
 
-def getitem(keys, preserve_single_index):
+def value_schema(outer, item_schema):
+    """Returns the schema of the values that `outer` passes on to its mapper for items with schema `item_schema`."""
+    mapper_type = outer.mapper_type[1]
+    if mapper_type is getitem_atom or mapper_type is getitem_atom_preserve_single_value:
+        return schema.schema_get(item_schema, outer.mapper_args)
+    if mapper_type is mapper_all or mapper_type is getitem_filter:
+        return schema.element_schema(item_schema)
+    return schema.ANY
+
+
+def getitem(keys, preserve_single_index, item_schema=schema.ANY):
     # TODO: move the to_lambda calls into dsl!
     if is_lambda_dsl(keys):
         return getitem_filter(keys)
@@ -94,14 +210,14 @@ def getitem(keys, preserve_single_index):
         return mapper_all
 
     if isinstance(keys, list):
-        return getitem_list(keys)
+        return getitem_list(keys, item_schema)
 
     if isinstance(keys, tuple):
         # TODO: guess proper names from keys
-        return getitem_dict({key: key for key in keys})
+        return getitem_dict({key: key for key in keys}, item_schema)
 
     if isinstance(keys, dict):
-        return getitem_dict(keys)
+        return getitem_dict(keys, item_schema)
 
     if dataclasses.is_dataclass(keys) and isinstance(keys, type):
         return getitem_dataclass(keys)
@@ -110,19 +226,19 @@ def getitem(keys, preserve_single_index):
         return getitem_filter(keys)
 
     if isinstance(keys, keyed_sequence.KeyedSequence):
-        return getitem_dict({**keys})
+        return getitem_dict({**keys}, item_schema)
 
     if isinstance(keys, interface.Literal):
         keys = keys.value
 
     if preserve_single_index:
-        return getitem_atom_preserve_single_value(keys)
+        return getitem_atom_preserve_single_value(keys, item_schema)
 
-    return getitem_atom(keys)
+    return getitem_atom(keys, item_schema)
 
 
-def getitem_atom_preserve_single_value(key):
-    sub_outer = getitem_atom(key)
+def getitem_atom_preserve_single_value(key, item_schema=schema.ANY):
+    sub_outer = getitem_atom(key, item_schema)
 
     def outer(mapper):
         def inner(item):
@@ -136,29 +252,76 @@ def getitem_atom_preserve_single_value(key):
             inner.mapper_args = key
         return inner
 
+    outer.mapper_type = ("getitem_atom_preserve_single_value", getitem_atom_preserve_single_value)
+    outer.mapper_args = key
     return outer
 
 
-def getitem_atom(key):
-    def outer(mapper):
-        getkey = key_getter(key)
+def getitem_atom(key, item_schema=schema.ANY):
+    getkey = key_getter(key, item_schema)
 
+    def outer(mapper):
         def inner(item):
             result = getkey(item)
             if result is not None:
                 result = mapper(result)
             return result
 
+        # Allows `mapper_all` to fetch whole columns from `columnar.Columns`.
+        inner.column_fetch = (key, mapper)
         if __debug__:
             inner.mapper_type = ("getitem_atom", getitem_atom)
             inner.mapper_args = key
         return inner
 
+    outer.mapper_type = ("getitem_atom", getitem_atom)
+    outer.mapper_args = key
+    outer.key_getter = getkey
+    return outer
+
+
+def getitem_path(keys: tuple, key_getters: tuple = None):
+    """Looks up `keys` one after the other in a single stage (like chained `getitem_atom`s, see `teddy.optimizer`).
+
+    `key_getters` are the getters for the keys (default: `key_getter(key)`).
+    """
+    keys = tuple(keys)
+    key_getters = tuple(key_getters) if key_getters is not None else tuple(map(key_getter, keys))
+
+    def outer(mapper):
+        def inner(item):
+            for getkey in key_getters:
+                item = getkey(item)
+                if item is None:
+                    return None
+            return mapper(item)
+
+        # Allows `mapper_all` to fetch whole columns from `columnar.Columns`.
+        inner.column_fetch = (keys[0], getitem_path(keys[1:], key_getters[1:])(mapper) if len(keys) > 1 else mapper)
+        if __debug__:
+            inner.mapper_type = ("getitem_path", getitem_path)
+            inner.mapper_args = keys
+        return inner
+
+    outer.mapper_type = ("getitem_path", getitem_path)
+    outer.mapper_args = keys
+    outer.key_getters = key_getters
     return outer
 
 
 def mapper_all(mapper):
+    parallel_apply = getattr(mapper, "parallel_apply", None)
+    # Set on the continuation of aggregations (see `teddy.aggregations`), which take whole items.
+    aggregate = getattr(mapper, "aggregate", None)
+
     def inner(item):
+        if aggregate is not None:
+            return aggregate(item)
+        if parallel_apply is not None:
+            f, executor, chunksize, apply_mapper = parallel_apply
+            return map_parallel(executor, f, 1, chunksize, item, apply_mapper)
+        if type(item) is columnar.Columns:
+            return columnar.map_all(item, mapper, id_func)
         return FiniteGenerator.wrap(item).map_values(mapper).result_or_none
 
     if __debug__:
@@ -166,22 +329,105 @@ def mapper_all(mapper):
     return inner
 
 
+mapper_all.mapper_type = ("mapper_all", mapper_all)
+mapper_all.mapper_args = None
+
+
 def getargcount(f):
     if hasattr(f, "args"):
         return len(f.args)
+    if type(f) is types.FunctionType and not hasattr(f, "__wrapped__") and not hasattr(f, "__signature__"):
+        # Same as the signature below, but without building it.
+        code = f.__code__
+        flags = code.co_flags
+        return code.co_argcount + bool(flags & inspect.CO_VARARGS) + bool(flags & inspect.CO_VARKEYWORDS)
     # TODO: how do we check signatures in general?
     sig = inspect.signature(f)
     return sum(1 for p in sig.parameters.values() if p.kind != p.KEYWORD_ONLY)
 
 
+# Args resolvers for the implicit lambdas of the different stages. (They are part of the keys of `_lambdas`, so they
+# must only be created once.)
+_FILTER_ARGS = args_resolver.from_allowed_signatures(("_",), ("key",), ("_", "value"), ("key", "value"), ("key", "_"))
+_VALUE_ARGS = args_resolver.from_allowed_signatures(("_",), ("value",), ("key", "value"), ("key", "_"))
+_KEY_ARGS = args_resolver.from_allowed_signatures(("_",), ("key",), ("key", "value"), ("_", "value"))
+_KV_ARGS = args_resolver.from_allowed_signatures(("key", "value"), ("key", "_"))
+_SINGLE_ARG = args_resolver.flexible_args(required_args=1)
+
+# (resolver, structure of the expression) -> (expression, compiled lambda). The expression is kept alive, so the ids
+# of its literals in the key stay valid.
+_lambdas = {}
+_MAX_LAMBDAS = 4096
+_INLINE_TYPES = frozenset((int, str, bool, bytes, type(None)))
+
+
+def _structure(expr):
+    """Returns a hashable key that is equal for implicit-lambda expressions that compile to the same code and refs.
+
+    (The expressions themselves hash by id.) Other objects (like functions in calls) are compared by identity.
+    """
+    expr_type = type(expr)
+    if expr_type in _INLINE_TYPES:
+        return expr_type, expr
+    if expr_type is float:
+        # (-0.0 == 0.0, but they are different literals.)
+        return expr_type, repr(expr)
+    if expr_type is expression.AccessorExpression:
+        return expr_type, expr.op, _structure(expr.target), _structure(expr.key)
+    if expr_type is expression.OpExpression:
+        return expr_type, expr.op, expr.num_args, _structure(expr.arg0), _structure(expr.arg1), _structure(expr.arg2)
+    if expr_type is expression.ArgsAccessor:
+        return expr_type, expr.order, expr.name
+    if expr_type is expression.KwArgsAccessor:
+        return expr_type, expr.name
+    if expr_type is expression.LiteralExpression:
+        return expr_type, _structure(expr.literal)
+    if expr_type is expression.CallExpression:
+        return expr_type, _structure(expr.target), _structure(tuple(expr.args)), _structure(expr.kwargs)
+    if expr_type is expression.LambdaExpression:
+        return expr_type, _structure(expr.expr), expr.args, expr.kwargs, _structure(expr.defaults)
+    if expr_type is tuple or expr_type is list or expr_type is set:
+        return (expr_type,) + tuple(map(_structure, expr))
+    if expr_type is dict:
+        return (expr_type,) + tuple((_structure(key), _structure(value)) for key, value in expr.items())
+    if expr_type is slice:
+        return expr_type, _structure(expr.start), _structure(expr.stop), _structure(expr.step)
+    return "id", id(expr)
+
+
+def compile_lambda(f, resolver):
+    """`to_lambda(f, args_resolver=resolver)`, but implicit lambdas with the same structure are only compiled once."""
+    if not is_lambda_dsl(f):
+        return to_lambda(f, args_resolver=resolver)
+    expr = get_expr(f)
+    key = (resolver, _structure(expr))
+    entry = _lambdas.get(key)
+    if entry is None:
+        if len(_lambdas) >= _MAX_LAMBDAS:
+            _lambdas.clear()
+        entry = _lambdas[key] = (expr, to_lambda(f, args_resolver=resolver))
+    return entry[1]
+
+
+def key_literal(dsl, arg_names):
+    """Returns `x` if `dsl` is `_key == x` for a str `x` (which only matches a single key), or None."""
+    expr = get_expr(dsl)
+    if not isinstance(expr, expression.OpExpression) or expr.op is not expression.ComparisonOps.EQ:
+        return None
+    for arg, other in ((expr.arg0, expr.arg1), (expr.arg1, expr.arg0)):
+        if isinstance(other, expression.LiteralExpression):
+            other = other.literal
+        if isinstance(arg, expression.ArgsAccessor) and arg_names.index(arg.name) == 0 and type(other) is str:
+            return other
+    return None
+
+
 def getitem_filter(f):
-    f = to_lambda(
-        f,
-        args_resolver=args_resolver.from_allowed_signatures(
-            ("_",), ("key",), ("_", "value"), ("key", "value"), ("key", "_")
-        ),
-    )
+    dsl = f if is_lambda_dsl(f) else None
+    f = compile_lambda(f, _FILTER_ARGS)
     argcount = getargcount(f)
+    mask = vectorize.mask_function(dsl, f.args) if dsl is not None else None
+    key = key_literal(dsl, f.args) if dsl is not None else None
     if argcount == 1:
         filter_item = transformers.filter_keys(f)
     elif argcount == 2:
@@ -191,6 +437,18 @@ def getitem_filter(f):
 
     def outer(mapper):
         def inner(item):
+            if key is not None and type(item) is keyed_sequence.KeyedSequence:
+                # Look the key up (using the index of the KeyedSequence, see `index_by`) instead of scanning.
+                value = item.get(key)
+                if value is not None:
+                    value = mapper(value)
+                return keyed_sequence.KeyedSequence({key: value}) if value is not None else None
+            if mask is not None:
+                array = vectorize.as_array(item)
+                if array is not None:
+                    indices = vectorize.select(array, mask)
+                    if indices is not None:
+                        return vectorize.filter_array(array, indices, mapper, id_func)
             return FiniteGenerator.wrap(item).adapt(filter_item).map_values(mapper).result_or_none
 
         if __debug__:
@@ -198,6 +456,8 @@ def getitem_filter(f):
             inner.mapper_args = f
         return inner
 
+    outer.mapper_type = ("getitem_filter", getitem_filter)
+    outer.mapper_args = f
     return outer
 
 
@@ -215,11 +475,17 @@ def getitem_dataclass(keys):
             inner.mapper_args = keys
         return inner
 
+    outer.mapper_type = ("getitem_dataclass", getitem_dataclass)
+    outer.mapper_args = keys
     return outer
 
 
-def getitem_dict(mapping):
-    sub_outers = [(name, getitem(key, preserve_single_index=False)) for name, key in mapping.items()]
+def getitem_dict(mapping, item_schema=schema.ANY, sub_outers=None):
+    # `sub_outers` (pairs of name and outer) replace the lookups of the keys in `mapping` (see `teddy.optimizer`).
+    if sub_outers is None:
+        sub_outers = [
+            (name, getitem(key, preserve_single_index=False, item_schema=item_schema)) for name, key in mapping.items()
+        ]
 
     def outer(mapper):
         sub_mappers = [(key, sub_outer(mapper)) for key, sub_outer in sub_outers]
@@ -232,11 +498,14 @@ def getitem_dict(mapping):
             inner.mapper_args = mapping
         return inner
 
+    outer.mapper_type = ("getitem_dict", getitem_dict)
+    outer.mapper_args = mapping
+    outer.sub_outers = sub_outers
     return outer
 
 
-def getitem_list(keys):
-    sub_outers = [(i, getitem(key, preserve_single_index=False)) for i, key in enumerate(keys)]
+def getitem_list(keys, item_schema=schema.ANY):
+    sub_outers = [(i, getitem(key, preserve_single_index=False, item_schema=item_schema)) for i, key in enumerate(keys)]
 
     def outer(mapper):
         sub_mappers = [(key, sub_outer(mapper)) for key, sub_outer in sub_outers]
@@ -252,25 +521,90 @@ def getitem_list(keys):
             inner.mapper_args = keys
         return inner
 
+    outer.mapper_type = ("getitem_list", getitem_list)
+    outer.mapper_args = keys
     return outer
 
 
-def apply(f, args=None, kwargs=None):
-    f = to_lambda(f, args_resolver=args_resolver.flexible_args(required_args=1))
+class PicklableLambda:
+    """A picklable stand-in for an implicit lambda (which is compiled with `eval` and can't be pickled).
+
+    Only the code and the refs of the lambda are pickled. It is compiled again on first use after unpickling.
+    """
+
+    __slots__ = ("code", "refs", "_f")
+
+    def __init__(self, f):
+        self.code = f.code
+        self.refs = f.refs
+        self._f = f
+
+    def __getstate__(self):
+        return self.code, self.refs
+
+    def __setstate__(self, state):
+        self.code, self.refs = state
+        self._f = None
+
+    def __call__(self, *args):
+        f = self._f
+        if f is None:
+            f = self._f = eval(self.code, dict(self.refs, math=math))
+        return f(*args)
+
+
+def picklable(f):
+    """Returns `f` in a form that can be sent to worker processes."""
+    if hasattr(f, "code") and hasattr(f, "refs"):
+        return PicklableLambda(f)
+    return f
+
+
+def map_parallel(executor, f, argcount, chunksize, item, mapper=id_func):
+    """Maps the values of `item` with `f` using `executor` and applies `mapper` to the results.
+
+    Returns the resulting `KeyedSequence` (with the original keys in order, dropping Nones) or None.
+    """
+    kv = tuple(transformers.to_kv(item))
+    if not kv:
+        return None
+    keys, values = zip(*kv)
+    if argcount == 1:
+        results = list(executor.map(f, values, chunksize=chunksize))
+    else:
+        results = list(executor.map(f, keys, values, chunksize=chunksize))
+    return columnar.map_values(keys, results, mapper, id_func)
+
+
+def apply(f, args=None, kwargs=None, executor=None, chunksize=1):
+    f = compile_lambda(f, _SINGLE_ARG)
 
     args = args or []
     kwargs = kwargs or {}
-    f_partial = functools.partial(f, *args, **kwargs)
+    f_partial = functools.partial(f if executor is None else picklable(f), *args, **kwargs)
 
     def outer(mapper):
-        def inner(item):
-            return mapper(f_partial(item))
+        if executor is None:
+
+            def inner(item):
+                return mapper(f_partial(item))
+
+        else:
+
+            def inner(item):
+                return mapper(executor.submit(f_partial, item).result())
+
+            # Allows `mapper_all` to apply `f` to all values at once.
+            inner.parallel_apply = (f_partial, executor, chunksize, mapper)
 
         if __debug__:
             inner.mapper_type = ("apply", apply)
             inner.mapper_args = (f, args, kwargs)
         return inner
 
+    outer.mapper_type = ("apply", apply)
+    outer.mapper_args = (f, args, kwargs)
+    outer.executor = executor
     return outer
 
 
@@ -287,13 +621,13 @@ def call(args=None, kwargs=None):
             inner.mapper_args = (args, kwargs)
         return inner
 
+    outer.mapper_type = ("call", call)
+    outer.mapper_args = (args, kwargs)
     return outer
 
 
-def map_values(f):
-    f = to_lambda(
-        f, args_resolver=args_resolver.from_allowed_signatures(("_",), ("value",), ("key", "value"), ("key", "_"))
-    )
+def map_values(f, executor=None, chunksize=1):
+    f = compile_lambda(f, _VALUE_ARGS)
 
     argcount = getargcount(f)
     if argcount == 1:
@@ -302,10 +636,14 @@ def map_values(f):
         map_item = transformers.map_kv(lambda key, value: (key, f(key, value)))
     else:
         raise NotImplementedError(f"{f} not supported for filtering (only 1 or 2 arguments)!")
+    remote_f = picklable(f) if executor is not None else None
 
     def outer(mapper):
         def inner(item):
-            result = FiniteGenerator.wrap(item).adapt(map_item).result_or_none
+            if executor is not None:
+                result = map_parallel(executor, remote_f, argcount, chunksize, item)
+            else:
+                result = FiniteGenerator.wrap(item).adapt(map_item).result_or_none
             if result is not None:
                 result = mapper(result)
             return result
@@ -315,11 +653,14 @@ def map_values(f):
             inner.mapper_args = f
         return inner
 
+    outer.mapper_type = ("map_values", map_values)
+    outer.mapper_args = f
+    outer.executor = executor
     return outer
 
 
 def map_kv(f):
-    f = to_lambda(f, args_resolver=args_resolver.from_allowed_signatures(("key", "value"), ("key", "_")))
+    f = compile_lambda(f, _KV_ARGS)
 
     argcount = getargcount(f)
     if argcount != 2:
@@ -337,13 +678,13 @@ def map_kv(f):
             inner.mapper_args = f
         return inner
 
+    outer.mapper_type = ("map_kv", map_kv)
+    outer.mapper_args = f
     return outer
 
 
 def map_keys(f):
-    f = to_lambda(
-        f, args_resolver=args_resolver.from_allowed_signatures(("_",), ("key",), ("key", "value"), ("_", "value"))
-    )
+    f = compile_lambda(f, _KEY_ARGS)
 
     argcount = getargcount(f)
     if argcount == 1:
@@ -365,6 +706,63 @@ def map_keys(f):
             inner.mapper_args = f
         return inner
 
+    outer.mapper_type = ("map_keys", map_keys)
+    outer.mapper_args = f
+    return outer
+
+
+# `index_by` keeps the results for at most this many items per stage (and starts over when it's full).
+_MAX_INDEXED_ITEMS = 1024
+
+
+def _size(item):
+    try:
+        return len(item)
+    except TypeError:
+        return None
+
+
+def index_by(f):
+    """Like `map_keys`, but the result is only computed once per item and kept (until `indexes` is cleared).
+
+    Lookups in the result use its key index, which is kept along with it. The result is computed again when the
+    length of the item changes (e.g. after an append), but other changes need `indexes` to be cleared.
+    """
+    f = compile_lambda(f, _VALUE_ARGS)
+
+    argcount = getargcount(f)
+    if argcount == 1:
+        map_item = transformers.map_kv(lambda key, value: (f(value), value))
+    elif argcount == 2:
+        map_item = transformers.map_kv(lambda key, value: (f(key, value), value))
+    else:
+        raise NotImplementedError(f"{f} not supported for indexing (only 1 or 2 arguments)!")
+
+    # Maps id(item) to (item, size, result). We keep the item, so its id can't be reused.
+    indexes = {}
+
+    def outer(mapper):
+        def inner(item):
+            entry = indexes.get(id(item))
+            size = _size(item)
+            if entry is None or entry[0] is not item or entry[1] != size:
+                if len(indexes) >= _MAX_INDEXED_ITEMS:
+                    indexes.clear()
+                result = FiniteGenerator.wrap(item).adapt(map_item).result_or_none
+                entry = indexes[id(item)] = (item, size, result)
+            result = entry[2]
+            if result is not None:
+                result = mapper(result)
+            return result
+
+        if __debug__:
+            inner.mapper_type = ("index_by", index_by)
+            inner.mapper_args = f
+        return inner
+
+    outer.mapper_type = ("index_by", index_by)
+    outer.mapper_args = f
+    outer.indexes = indexes
     return outer
 
 
@@ -383,7 +781,8 @@ def groupby(keys, drop_none_keys=True, preserve_single_index=False):
                 if drop_none_keys and new_key is None:
                     continue
 
-                if new_key not in results:
+                group = results.get(new_key)
+                if group is None:
                     group = results[new_key] = []
                 group.append(key_value)
             results = {key: keyed_sequence.KeyedSequence(group) for key, group in results.items()}
@@ -391,9 +790,78 @@ def groupby(keys, drop_none_keys=True, preserve_single_index=False):
 
         return inner
 
+    outer.mapper_type = ("groupby", groupby)
+    outer.mapper_args = (keys, drop_none_keys, preserve_single_index)
     return outer
 
 
+def join_key_getter(on):
+    """Returns a function that returns the join key of a value for `on` (a key or a function of the value)."""
+    if is_lambda_dsl(on) or callable(on):
+        return compile_lambda(on, _SINGLE_ARG)
+    return key_getter(on)
+
+
+def _join_keys(join_key):
+    # List-valued keys (e.g. a list of foreign keys) are many-to-many.
+    if type(join_key) is list or type(join_key) is tuple:
+        return join_key
+    if join_key is None:
+        return ()
+    return (join_key,)
+
+
+def hash_join(left_on, right_on, how="inner"):
+    """Returns `join(left, right)` that joins the items of `left` and `right` whose join keys are equal.
+
+    The join keys are given by `left_on` and `right_on` (see `join_key_getter`). `join` builds a hash table on the
+    smaller side and probes it with the larger one. Its result maps `(left_key, right_key)` to
+    `dict(left=left_value, right=right_value)` in the order of `left` (and `right`), or is None if nothing matches.
+    For `how="left"`, items of `left` without a match are kept with `right_key` and `right_value` None.
+    """
+    if how not in ("inner", "left"):
+        raise ValueError(f"Unsupported join {how!r} (only 'inner' and 'left')!")
+    get_left_key = join_key_getter(left_on)
+    get_right_key = join_key_getter(right_on)
+
+    def join(left, right):
+        left_items = list(transformers.to_kv(left)) if left is not None else []
+        right_items = list(transformers.to_kv(right)) if right is not None else []
+
+        build_left = len(left_items) < len(right_items)
+        if build_left:
+            build_items, get_build_key = left_items, get_left_key
+            probe_items, get_probe_key = right_items, get_right_key
+        else:
+            build_items, get_build_key = right_items, get_right_key
+            probe_items, get_probe_key = left_items, get_left_key
+
+        table = {}
+        for position, (key, value) in enumerate(build_items):
+            for join_key in _join_keys(get_build_key(value)):
+                table.setdefault(join_key, []).append(position)
+
+        matches = []
+        for position, (key, value) in enumerate(probe_items):
+            for join_key in _join_keys(get_probe_key(value)):
+                for build_position in table.get(join_key, ()):
+                    matches.append((build_position, position) if build_left else (position, build_position))
+
+        if how == "left":
+            matched = {left_position for left_position, right_position in matches}
+            matches.extend((position, -1) for position in range(len(left_items)) if position not in matched)
+        matches.sort()
+
+        results = {}
+        for left_position, right_position in matches:
+            left_key, left_value = left_items[left_position]
+            right_key, right_value = right_items[right_position] if right_position >= 0 else (None, None)
+            results[(left_key, right_key)] = dict(left=left_value, right=right_value)
+        return keyed_sequence.KeyedSequence(results) or None
+
+    return join
+
+
 def pipe(pipe_mappers):
     def outer(mapper):
         def inner(item):
@@ -406,6 +874,8 @@ def pipe(pipe_mappers):
 
         return inner
 
+    outer.mapper_type = ("pipe", pipe)
+    outer.mapper_args = pipe_mappers
     return outer
 
 
@@ -422,4 +892,6 @@ def zip_keys(keys, preserve_single_index: bool, relaxed: bool):
 
         return inner
 
+    outer.mapper_type = ("zip_keys", zip_keys)
+    outer.mapper_args = (keys, preserve_single_index, relaxed)
     return outer
@@ -0,0 +1,44 @@
+"""Pretty printing with `prettyprinter`, which is only imported on the first `pretty_repr`.
+
+Importing `prettyprinter` takes longer than importing the rest of teddy, so `register_pretty` only records the
+pretty printers of our types, and they are registered with `prettyprinter` when it is imported.
+"""
+import typing
+
+# (type, pretty printer) pairs that still need to be registered.
+_pending: typing.List[tuple] = []
+_prettyprinter = None
+
+
+def _import():
+    global _prettyprinter
+    if _prettyprinter is None:
+        import prettyprinter
+
+        for cls, printer in _pending:
+            prettyprinter.register_pretty(cls)(printer)
+        _pending.clear()
+        _prettyprinter = prettyprinter
+    return _prettyprinter
+
+
+def register_pretty(cls: type):
+    """Like `prettyprinter.register_pretty(cls)`, but deferred until `prettyprinter` is needed."""
+
+    def decorator(printer):
+        if _prettyprinter is None:
+            _pending.append((cls, printer))
+        else:
+            _prettyprinter.register_pretty(cls)(printer)
+        return printer
+
+    return decorator
+
+
+def pretty_repr(value) -> str:
+    return _import().pretty_repr(value)
+
+
+def pretty_call(ctx, fn, *args, **kwargs):
+    # (Only called from pretty printers, so `prettyprinter` has been imported already.)
+    return _prettyprinter.pretty_call(ctx, fn, *args, **kwargs)
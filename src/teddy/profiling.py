@@ -0,0 +1,154 @@
+"""Per-stage profiling of Teddy chains.
+
+`t.profile()` evaluates `t` with every popo stage wrapped in a timer and reports, per stage (see `Teddy._stages`):
+
+* calls: how many items the stage received,
+* out: how many items it passed on to the rest of the chain (e.g. `[:]` passes on every value of an item),
+* cumulative time: the time spent in the stage including the rest of the chain,
+* self time: the time spent in the stage itself (e.g. in a filter lambda or building `KeyedSequence`s).
+
+Stages are described by the DSL expression that created them (using the `mapper_type` and `mapper_args` tags).
+Tags that enable fast paths (like `column_fetch`) are kept, so the profiled chain takes the same paths as the
+original one. Stages that are skipped by a fast path show up with 0 calls.
+"""
+import dataclasses
+import time
+import typing
+
+from teddy import compiler
+from teddy import optimizer
+from teddy import popo
+
+# Tags on `inner`s that other stages look up on their continuation.
+_FAST_PATH_TAGS = ("column_fetch", "parallel_apply", "aggregate")
+
+
+@dataclasses.dataclass
+class StageStats:
+    expression: str
+    calls: int = 0
+    items_out: int = 0
+    cumulative_time: float = 0.0
+    self_time: float = 0.0
+
+
+@dataclasses.dataclass
+class Profile:
+    result: object
+    stages: typing.List[StageStats]
+    total_time: float
+
+    def report(self) -> str:
+        width = max([len("stage")] + [len(stats.expression) for stats in self.stages])
+        lines = [f"{'stage':<{width}}  {'calls':>8}  {'out':>8}  {'cum ms':>9}  {'self ms':>9}  {'self %':>6}"]
+        for stats in self.stages:
+            share = stats.self_time / self.total_time * 100 if self.total_time else 0.0
+            lines.append(
+                f"{stats.expression:<{width}}  {stats.calls:>8}  {stats.items_out:>8}  "
+                f"{stats.cumulative_time * 1e3:>9.3f}  {stats.self_time * 1e3:>9.3f}  {share:>6.1f}"
+            )
+        lines.append(f"total: {self.total_time * 1e3:.3f} ms")
+        return "\n".join(lines)
+
+    __str__ = report
+
+
+def _function_name(f):
+    code = getattr(f, "code", None)
+    if code is not None:
+        # Implicit lambdas.
+        return code[1:-1] if code.startswith("(") and code.endswith(")") else code
+    return getattr(f, "__qualname__", repr(f))
+
+
+def _key(key):
+    if type(key) is str and key.isidentifier():
+        return f".{key}"
+    if type(key) is slice and key == slice(None):
+        return "[:]"
+    return f"[{key!r}]"
+
+
+def describe(outer) -> str:
+    """Returns the DSL expression that created the popo `outer`."""
+    mapper_type = outer.mapper_type[1]
+    mapper_args = getattr(outer, "mapper_args", None)
+
+    if mapper_type is popo.getitem_atom or mapper_type is popo.getitem_atom_preserve_single_value:
+        return _key(mapper_args)
+    if mapper_type is popo.getitem_path:
+        return "".join(map(_key, mapper_args))
+    if mapper_type is popo.mapper_all:
+        return "[:]"
+    if mapper_type is popo.getitem_filter:
+        return f"[{_function_name(mapper_args)}]"
+    if mapper_type is popo.getitem_dataclass:
+        return f"[{mapper_args.__name__}]"
+    if mapper_type is popo.getitem_dict or mapper_type is popo.getitem_list:
+        return f"[{mapper_args!r}]"
+    if mapper_type is popo.apply:
+        return f".apply({_function_name(mapper_args[0])})"
+    if mapper_type is popo.call:
+        return "()"
+    if mapper_type in (popo.map_values, popo.map_keys, popo.index_by):
+        return f".{mapper_type.__name__}({_function_name(mapper_args)})"
+    if mapper_type is popo.map_kv:
+        return f".map({_function_name(mapper_args)})"
+    if mapper_type is popo.groupby:
+        return f".groupby({mapper_args[0]!r})"
+    if mapper_type is popo.zip_keys:
+        return ".zip()"
+    if mapper_type is popo.pipe:
+        return f".pipe(<{len(mapper_args)} exprs>)"
+    if mapper_type is optimizer.without_trailing_all:
+        return describe(mapper_args) + "[:]"
+    if mapper_type is compiler.compile_stages:
+        return "".join(map(describe, mapper_args)) + ".compile()"
+    return f"<{outer.mapper_type[0]}>"
+
+
+def _profiled(inner, stats: StageStats, child_times: list):
+    perf_counter = time.perf_counter
+
+    def profiled_inner(item):
+        stats.calls += 1
+        child_times.append(0.0)
+        start = perf_counter()
+        try:
+            return inner(item)
+        finally:
+            elapsed = perf_counter() - start
+            stats.cumulative_time += elapsed
+            stats.self_time += elapsed - child_times.pop()
+            if child_times:
+                child_times[-1] += elapsed
+
+    for tag in _FAST_PATH_TAGS:
+        if hasattr(inner, tag):
+            setattr(profiled_inner, tag, getattr(inner, tag))
+    return profiled_inner
+
+
+def profile(teddy) -> Profile:
+    """Evaluates `teddy` with every stage timed (see the module docstring)."""
+    stages = [StageStats(describe(outer)) for outer in teddy._stages]
+    final_calls = [0]
+
+    def mapper(value):
+        final_calls[0] += 1
+        return value
+
+    # (Stack of the time spent in the continuations of the stages that are running.)
+    child_times = []
+    for outer, stats in zip(reversed(teddy._stages), reversed(stages)):
+        mapper = _profiled(outer(mapper), stats, child_times)
+
+    start = time.perf_counter()
+    result = teddy._source(mapper)
+    total_time = time.perf_counter() - start
+
+    for stats, next_stats in zip(stages, stages[1:]):
+        stats.items_out = next_stats.calls
+    if stages:
+        stages[-1].items_out = final_calls[0]
+    return Profile(result, stages, total_time)
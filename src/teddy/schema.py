@@ -0,0 +1,136 @@
+"""Schemas of POPOs.
+
+A schema describes the containers in a data structure, so that popo can pick specialized getters ahead of time
+(instead of checking `isinstance(item, abc.Mapping)` etc. for every item). Leaves are described by their type.
+`ANY` is the unknown schema and always takes the generic code path.
+
+Schemas are only ever used as hints: the specialized getters check the exact type of every item and fall back to
+the generic getters when the data doesn't match the schema.
+"""
+import dataclasses
+import typing
+
+ANY = typing.Any
+# The schema of the elements of an empty list.
+NOTHING = typing.NoReturn
+
+
+@dataclasses.dataclass(frozen=True)
+class DictSchema:
+    __slots__ = ("type", "fields", "values")
+    type: type
+    fields: typing.Dict[object, object]
+    # The schema of values whose keys are not in `fields`.
+    values: object
+
+
+@dataclasses.dataclass(frozen=True)
+class SequenceSchema:
+    __slots__ = ("type", "element")
+    type: type
+    element: object
+
+
+@dataclasses.dataclass(frozen=True)
+class DataclassSchema:
+    __slots__ = ("type", "fields")
+    type: type
+    fields: typing.Dict[str, object]
+
+
+def merge_schemas(*schemas):
+    """Returns a schema that describes data that matches any of `schemas`."""
+    result = NOTHING
+    for schema in schemas:
+        result = _merge(result, schema)
+    return result
+
+
+def _merge(a, b):
+    if a is NOTHING or a is type(None):
+        return b
+    if b is NOTHING or b is type(None):
+        return a
+    if a == b:
+        return a
+    if type(a) is not type(b) or getattr(a, "type", None) is not getattr(b, "type", None):
+        return ANY
+    if isinstance(a, DictSchema):
+        fields = dict(a.fields)
+        for key, value in b.fields.items():
+            fields[key] = _merge(fields[key], value) if key in fields else value
+        return DictSchema(a.type, fields, _merge(a.values, b.values))
+    if isinstance(a, SequenceSchema):
+        return SequenceSchema(a.type, _merge(a.element, b.element))
+    if isinstance(a, DataclassSchema):
+        return DataclassSchema(a.type, {key: _merge(value, b.fields[key]) for key, value in a.fields.items()})
+    return ANY
+
+
+def infer_schema(data):
+    """Walks over `data` and returns the schema of its containers.
+
+    Only plain dicts, lists, tuples and dataclasses get a specialized schema. The elements of a sequence are merged
+    into a single element schema.
+    """
+    data_type = type(data)
+    if data_type is dict:
+        return DictSchema(dict, {key: infer_schema(value) for key, value in data.items()}, NOTHING)
+    if data_type is list or data_type is tuple:
+        return SequenceSchema(data_type, merge_schemas(*map(infer_schema, data)))
+    if dataclasses.is_dataclass(data) and not isinstance(data, type):
+        return DataclassSchema(
+            data_type, {field.name: infer_schema(getattr(data, field.name)) for field in dataclasses.fields(data)}
+        )
+    return data_type
+
+
+def canonical_schema(spec):
+    """Converts a user-supplied schema into a schema.
+
+    Like in `spikes/spike_schema.py`: dicts specify dicts with the given keys, lists specify lists (with the schema
+    of their elements as only entry), dataclass types specify dataclasses, and `typing.List`, `typing.Tuple` and
+    `typing.Dict` work as expected.
+    """
+    if isinstance(spec, (DictSchema, SequenceSchema, DataclassSchema)):
+        return spec
+    if isinstance(spec, dict):
+        return DictSchema(dict, {key: canonical_schema(value) for key, value in spec.items()}, NOTHING)
+    if isinstance(spec, list):
+        return SequenceSchema(list, canonical_schema(spec[0]) if spec else ANY)
+    if dataclasses.is_dataclass(spec) and isinstance(spec, type):
+        return DataclassSchema(spec, {field.name: canonical_schema(field.type) for field in dataclasses.fields(spec)})
+
+    origin = getattr(spec, "__origin__", None)
+    args = getattr(spec, "__args__", None) or ()
+    if origin is list:
+        return SequenceSchema(list, canonical_schema(args[0]) if args else ANY)
+    if origin is tuple:
+        return SequenceSchema(tuple, merge_schemas(*map(canonical_schema, args)) if args else ANY)
+    if origin is dict:
+        return DictSchema(dict, {}, canonical_schema(args[1]) if args else ANY)
+    if isinstance(spec, type):
+        return spec
+    return ANY
+
+
+def schema_get(schema, key):
+    """Returns the schema of `item[key]` for an item with the given schema."""
+    if isinstance(schema, DictSchema):
+        return schema.fields.get(key, schema.values)
+    if isinstance(schema, SequenceSchema):
+        return schema.element
+    if isinstance(schema, DataclassSchema):
+        return schema.fields.get(key, ANY)
+    return ANY
+
+
+def element_schema(schema):
+    """Returns the schema of the values of an item with the given schema (as seen by `[:]`)."""
+    if isinstance(schema, DictSchema):
+        return merge_schemas(schema.values, *schema.fields.values())
+    if isinstance(schema, SequenceSchema):
+        return schema.element
+    if isinstance(schema, DataclassSchema):
+        return merge_schemas(*schema.fields.values())
+    return ANY
@@ -0,0 +1,168 @@
+"""Streaming sources.
+
+`teddy.stream(source)` reads top-level records lazily (e.g. from a JSON Lines file) and pushes each record through
+the query as it arrives, so the data never needs to fit into memory.
+
+A stream behaves like `teddy(records)[:]`: everything that is chained onto it is applied to each record. Results
+can be consumed incrementally (`items()`), into a bounded buffer (`buffer(maxlen)`), or all at once (`result`).
+"""
+import collections
+import dataclasses
+import json
+import os
+import typing
+
+from teddy import aggregations
+from teddy import dsl
+from teddy import interface
+from teddy.keyed_sequence import KeyedSequence
+
+
+def read_jsonl(path):
+    """Yields the records of the JSON Lines file at `path` (skipping empty lines)."""
+    with open(path, "rb") as f:
+        yield from read_json_lines(f)
+
+
+def read_json_lines(lines: typing.Iterable):
+    """Yields the records of an iterable of JSON lines (str or bytes, e.g. a file object)."""
+    for line in lines:
+        if line.strip():
+            yield json.loads(line)
+
+
+@dataclasses.dataclass(frozen=True)
+class Stream:
+    """Records that are pushed through a query one at a time (see the module docstring)."""
+
+    # (Underscored because everything else is forwarded to `__getattr__` as a key.)
+    # Returns a new iterator over the records every time it is called.
+    _records: typing.Callable[[], typing.Iterator]
+    # A zombie Teddy (see `dsl._teddy`) that is applied to each record.
+    _query: dsl.Teddy = dsl._teddy
+
+    def _chain(self, query):
+        return dataclasses.replace(self, _query=query)
+
+    def items(self):
+        """Yields `(index, result)` for each record whose result is not None, as the records arrive."""
+        mapper = self._query.iterable(dsl.id_func)
+        for index, record in enumerate(self._records()):
+            result = mapper(record)
+            if result is not None:
+                yield index, result
+
+    def __iter__(self):
+        return (result for index, result in self.items())
+
+    @property
+    def result(self):
+        """The results for all records (like `teddy(records)[:].result`)."""
+        return KeyedSequence(self.items()) or None
+
+    def buffer(self, maxlen: int):
+        """Consumes the stream and returns the results for the last `maxlen` records that had one."""
+        return KeyedSequence(collections.deque(self.items(), maxlen=maxlen)) or None
+
+    def _aggregate(self, aggregation):
+        def iterable(mapper):
+            inner = self._query.iterable(mapper)
+            for record in self._records():
+                inner(record)
+
+        try:
+            return aggregations.aggregate(iterable, aggregation)
+        except Exception:
+            raise RuntimeError("Aggregation error")
+
+    def sum(self):
+        """Aggregates the results for all records as they arrive (see `teddy.aggregations`)."""
+        return self._aggregate(aggregations.SUM)
+
+    def mean(self):
+        return self._aggregate(aggregations.MEAN)
+
+    def count(self):
+        return self._aggregate(aggregations.COUNT)
+
+    def min(self):
+        return self._aggregate(aggregations.MIN)
+
+    def max(self):
+        return self._aggregate(aggregations.MAX)
+
+    def reduce(self, f, init=aggregations.MISSING):
+        return self._aggregate(aggregations.reduction(f, init))
+
+    def compile(self):
+        return self._chain(self._query.compile())
+
+    def apply(self, f=None, *, args=None, kwargs=None, executor=None, chunksize=1):
+        return self._chain(self._query.apply(f, args=args, kwargs=kwargs, executor=executor, chunksize=chunksize))
+
+    def __call__(self, f=None):
+        return self.apply(f)
+
+    def map_values(self, f, *, executor=None, chunksize=1):
+        return self._chain(self._query.map_values(f, executor=executor, chunksize=chunksize))
+
+    def amap_values(self, coro_fn, *, concurrency=64):
+        return self._chain(self._query.amap_values(coro_fn, concurrency=concurrency))
+
+    def aapply(self, coro_fn, *, args=None, kwargs=None, concurrency=64):
+        return self._chain(self._query.aapply(coro_fn, args=args, kwargs=kwargs, concurrency=concurrency))
+
+    def map(self, f):
+        return self._chain(self._query.map(f))
+
+    def map_keys(self, f):
+        return self._chain(self._query.map_keys(f))
+
+    def index_by(self, f):
+        return self._chain(self._query.index_by(f))
+
+    def reindex(self):
+        self._query.reindex()
+        return self
+
+    def zip(self, keys=interface.all_keys, *, relaxed=False):
+        return self._chain(self._query.zip(keys, relaxed=relaxed))
+
+    def groupby(self, keys, drop_none_keys=False, preserve_single_index=None):
+        return self._chain(
+            self._query.groupby(keys, drop_none_keys=drop_none_keys, preserve_single_index=preserve_single_index)
+        )
+
+    def pipe(self, *teddy_exprs, preserve_single_index=None):
+        return self._chain(self._query.pipe(*teddy_exprs, preserve_single_index=preserve_single_index))
+
+    def optimize(self):
+        return self._chain(self._query.optimize())
+
+    def to_attr_map(self):
+        return self._chain(self._query.to_attr_map())
+
+    def __getitem__(self, key):
+        return self._chain(self._query[key])
+
+    def __getattr__(self, key):
+        # Like `Teddy.__getattr__`, attributes are keys (Teddy methods are forwarded explicitly above).
+        if key.startswith("__"):
+            raise AttributeError(key)
+        return self[key]
+
+
+def stream(source) -> Stream:
+    """Streams the records of `source`.
+
+    `source` can be the path of a JSON Lines file, a file object with JSON lines, or any iterable of records.
+    Paths are re-read every time the stream is consumed; file objects and iterators can only be consumed once.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return Stream(lambda: read_jsonl(source))
+    if hasattr(source, "read"):
+        return Stream(lambda: read_json_lines(source))
+    return Stream(lambda: iter(source))
+
+
+dsl.teddy.stream = stream
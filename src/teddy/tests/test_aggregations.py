@@ -0,0 +1,96 @@
+import operator
+
+import pytest
+
+from teddy import teddy, _value, KeyedSequence
+
+runs = [dict(epochs=[dict(loss=(i * 7 + j) % 10 / 10, step=j) for j in range(40)]) for i in range(5)]
+losses = [epoch["loss"] for run in runs for epoch in run["epochs"]]
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+@pytest.mark.parametrize("compile", [False, True])
+def test_aggregations(columnar, compile):
+    query = teddy(runs, columnar=columnar)[:].epochs[:].loss
+    if compile:
+        query = query.compile()
+    assert query.sum() == pytest.approx(sum(losses))
+    assert query.count() == len(losses)
+    assert query.mean() == pytest.approx(sum(losses) / len(losses))
+    assert query.min() == min(losses)
+    assert query.max() == max(losses)
+    assert query.reduce(operator.add, 0.0) == pytest.approx(sum(losses))
+    assert query.reduce(lambda a, b: b) == losses[-1]
+
+
+def test_containers():
+    data = dict(a=[1, 2, None, 3], b=dict(c=4, d=KeyedSequence(x=5)), e=None)
+    assert teddy(data).a.sum() == 6
+    assert teddy(data).a.count() == 3
+    assert teddy(data).a.max() == 3
+    assert teddy(data).b.d.sum() == 5
+    # Strings are values, not containers.
+    assert teddy(["b", "a", "c"]).min() == "a"
+    assert teddy(["b", "a", "c"]).reduce(operator.add) == "bac"
+    assert teddy(list(range(100)))[_value % 2 == 1].sum() == 2500
+
+
+def test_nested_values():
+    # Only the values of the result are aggregated, not their contents.
+    assert teddy([[1, 2], [3]]).count() == 2
+    assert teddy(dict(a=[1, 2, None, 3], b=dict(c=4), e=None)).count() == 2
+    assert teddy([[1, 2], [3]])[:].apply(len).sum() == 3
+    with pytest.raises(RuntimeError):
+        teddy([[1, 2], [3]]).sum()
+
+    records = [dict(a=1, b=2), dict(a=3, b=4)]
+    assert teddy(records).count() == 2
+    assert teddy(records).reduce(lambda result, record: result + [record], []) == records
+    assert teddy(records)[:].reduce(lambda result, record: result + [record], []) == records
+    # Fan-outs of the query are flattened.
+    assert teddy(records)[:].count() == 2
+    assert teddy(records)[:][:].count() == 4
+    assert teddy(records)[:]["a", "b"].sum() == 10
+    assert teddy(records).groupby("a")[:][:].b.sum() == 6
+    assert teddy([dict(a=[1, 2]), dict(a=[3])])[:].a.count() == 2
+
+
+def test_empty():
+    assert teddy([]).sum() == 0
+    assert teddy([]).count() == 0
+    assert teddy([None]).mean() is None
+    assert teddy([]).min() is None
+    assert teddy([]).reduce(operator.add) is None
+    assert teddy([]).reduce(operator.add, 1) == 1
+
+    with pytest.raises(RuntimeError):
+        teddy([1, "a"]).sum()
+
+
+def test_numpy():
+    numpy = pytest.importorskip("numpy")
+    array = numpy.arange(12, dtype=numpy.int64)
+    assert teddy(dict(x=array)).x.sum() == 66
+    assert type(teddy(dict(x=array)).x.max()) is int
+    # The values of a 2D array are its rows.
+    assert teddy(array.reshape(3, 4)).count() == 3
+    assert teddy(numpy.array([0.5, 1.5]))[_value > 1].mean() == 1.5
+    assert teddy(dict(x=numpy.array([], dtype=float))).x.max() is None
+
+
+def test_int64_overflow():
+    pytest.importorskip("numpy")
+    # Nanosecond timestamps: their sum doesn't fit into int64.
+    data = [dict(time=1_700_000_000_000_000_000 + i) for i in range(10)]
+    times = [record["time"] for record in data]
+    assert teddy(data, columnar=True)[:].time.sum() == teddy(data)[:].time.sum() == sum(times)
+    assert teddy(data, columnar=True)[:].time.mean() == teddy(data)[:].time.mean() == sum(times) / 10
+    assert teddy(data, columnar=True)[:].time.max() == max(times)
+
+
+def test_stream():
+    records = [dict(loss=loss) for loss in losses]
+    assert teddy.stream(iter(records)).loss.sum() == pytest.approx(sum(losses))
+    assert teddy.stream(records).loss.count() == len(losses)
+    with pytest.raises(RuntimeError):
+        teddy.stream(records).apply(str).sum()
@@ -0,0 +1,65 @@
+import concurrent.futures
+import json
+
+import pytest
+
+from teddy import teddy, _teddy, KeyedSequence
+from teddy import batching
+
+from data import laaos_data
+
+
+def accuracies(t):
+    return t.iterations[:].test_metrics.accuracy
+
+
+def load_store(run):
+    return dict(laaos_data.store, iterations=laaos_data.store["iterations"][:run])
+
+
+def stores():
+    return [load_store(run) for run in range(4)]
+
+
+def expected(store):
+    return teddy(store).iterations[:].test_metrics.accuracy.result
+
+
+@pytest.mark.parametrize("query", [accuracies, _teddy.iterations[:].test_metrics.accuracy])
+def test_batch_documents(query):
+    result = teddy.batch(stores(), query)
+    # The first store has no iterations (and thus no result).
+    assert result == KeyedSequence({run: expected(store) for run, store in enumerate(stores()) if run})
+
+    named = teddy.batch(dict(a=stores()[1], b=stores()[2]), query)
+    assert named == KeyedSequence(a=expected(stores()[1]), b=expected(stores()[2]))
+
+
+def test_batch_paths(tmp_path):
+    paths = []
+    for run, store in enumerate(stores()):
+        path = tmp_path / f"run{run}.json"
+        path.write_text(json.dumps(store))
+        paths.append(str(path))
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=2) as executor:
+        result = teddy.batch(paths, accuracies, executor=executor, chunksize=2)
+        with pytest.raises(TypeError):
+            teddy.batch(paths, _teddy.iterations, executor=executor)
+
+    assert result == KeyedSequence({path: expected(store) for path, store in zip(paths, stores()) if expected(store)})
+
+
+def test_batch_load():
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        result = teddy.batch(
+            range(1, 4), _teddy.iterations[:].test_metrics.accuracy, executor=executor, load=load_store
+        )
+    assert result == KeyedSequence({i: expected(load_store(run)) for i, run in enumerate(range(1, 4))})
+
+
+def test_batch_prepares_queries_once():
+    batching._prepared.clear()
+    teddy.batch(stores(), accuracies)
+    teddy.batch(stores(), accuracies)
+    assert len(batching._prepared) == 1
@@ -0,0 +1,64 @@
+import pytest
+
+from teddy import teddy, _value
+from teddy import columnar
+
+from data import laaos_data
+
+
+records = [dict(id=1, loss=0.5, meta=dict(tag="a")), dict(id=2, loss=0.25, meta=dict(tag="b"))]
+
+
+def test_to_columns():
+    columns = columnar.to_columns(records)
+    assert type(columns) is columnar.Columns
+    assert columns.fields == ("id", "loss", "meta")
+    assert type(columns.column("meta")) is columnar.Columns
+    assert columns.column("missing") is None
+    assert len(columns) == 2
+    assert columns == records
+    assert columns[1] == records[1]
+    assert columns[-1:] == records[-1:]
+    with pytest.raises(IndexError):
+        columns[2]
+
+    # Lists of records with different keys are left alone.
+    assert type(columnar.to_columns([dict(a=1), dict(b=2)])) is list
+    assert columnar.to_columns(dict(values=[1, 2])) == dict(values=[1, 2])
+
+
+def test_numeric_columns():
+    numpy = pytest.importorskip("numpy")
+
+    columns = columnar.to_columns(records)
+    assert columns.column("id").dtype == numpy.int64
+    assert columns.column("loss").dtype == numpy.float64
+    assert type(columns[0]["id"]) is int
+    # Mixed and non-numeric columns are kept as tuples.
+    assert type(columnar.to_columns([dict(a=1), dict(a=1.5)]).column("a")) is tuple
+    assert type(columnar.to_columns([dict(a=True), dict(a=False)]).column("a")) is tuple
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        lambda t: t[:].loss,
+        lambda t: t[:].meta.tag,
+        lambda t: t[:].meta,
+        lambda t: t[:].missing,
+        lambda t: t[:],
+        lambda t: t[:].loss.apply(_value * 2),
+        lambda t: t[:]["id", "loss"],
+        lambda t: t[1].meta,
+    ],
+)
+def test_columnar_teddy(query):
+    assert query(teddy(records, columnar=True)).result == query(teddy(records)).result
+
+
+def test_columnar_laaos():
+    columnar_store = teddy(laaos_data.store, columnar=True)
+    store = teddy(laaos_data.store)
+    assert columnar_store.iterations[:].test_metrics.result == store.iterations[:].test_metrics.result
+    assert columnar_store.iterations[:].test_metrics.nll.result == store.iterations[:].test_metrics.nll.result
+    assert columnar_store.iterations[:].chosen_samples[0].result == store.iterations[:].chosen_samples[0].result
@@ -0,0 +1,75 @@
+import dataclasses
+import pytest
+
+from teddy import teddy, _key, _value, _teddy
+from teddy import compiler
+
+from data import laaos_data
+
+double_list = [[1, 2], [3, 4, 5]]
+records = [dict(id=1, name="a", tags=["x", "y"]), dict(id=2, name="b"), dict(id=3, tags=[])]
+
+
+@dataclasses.dataclass(frozen=True)
+class DC2:
+    a: int
+    b: int
+
+
+queries = [
+    ("atom", lambda: teddy(double_list)[0]),
+    ("all_all", lambda: teddy(double_list)[:][:]),
+    ("all_atom", lambda: teddy(double_list)[:][2]),
+    ("missing_atom", lambda: teddy(records)[:].tags[1]),
+    ("filter_key", lambda: teddy(records)[_key > 0].name),
+    ("filter_kv", lambda: teddy(records)[lambda k, v: v["id"] % 2 == 1][:]),
+    ("map_values", lambda: teddy(records)[:].map_values(_value)),
+    ("map_values_kv", lambda: teddy(double_list).map_values(lambda k, v: k + len(v))),
+    ("map_keys", lambda: teddy(double_list)[:].map_keys(_key + 1)),
+    ("map_kv", lambda: teddy(double_list).map(lambda k, v: (str(k), v))[:]),
+    ("apply", lambda: teddy(double_list)[:].apply(len)),
+    ("call", lambda: teddy(lambda: double_list)()[1]),
+    ("getitem_dict", lambda: teddy(records)[:]["id", "name"]),
+    ("getitem_list", lambda: teddy(double_list)[[0, 1]][:]),
+    ("dataclass", lambda: teddy([DC2(1, 2), DC2(3, 4)])[:][DC2]),
+    ("groupby", lambda: teddy(records).groupby("id")[:][:].name),
+    ("preserve_single_index", lambda: teddy(double_list, preserve_single_index=True)[:][0]),
+    ("laaos", lambda: teddy(laaos_data.store).iterations[:].test_metrics[:]),
+    ("laaos_schema", lambda: teddy(laaos_data.store, schema=True).iterations[:].test_metrics.nll),
+    ("laaos_tuple", lambda: teddy(laaos_data.store).iterations[:]["num_epochs", "test_metrics"]),
+]
+
+
+@pytest.mark.parametrize(("name", "query"), queries)
+def test_compile(name, query):
+    assert query().compile().result == query().result
+
+
+def test_compile_chain_after_compile():
+    compiled = teddy(records).compile()[:].compile().name
+    assert compiled.result == teddy(records)[:].name.result
+    assert len(compiled.compile()._stages) == 1
+    assert len(compiler.flatten_stages(compiled.compile()._stages)) == 2
+
+
+def test_compile_zombie():
+    assert teddy(double_list).pipe(_teddy[:][0].compile()).result == [1, 3]
+
+
+def test_prepared_query():
+    query = _teddy.iterations[:].test_metrics.accuracy.compile()
+    stores = [laaos_data.store, dict(laaos_data.store, iterations=laaos_data.store["iterations"][:2]), dict()]
+    expected = [teddy(store).iterations[:].test_metrics.accuracy.result for store in stores]
+    assert query(stores[0]) == expected[0]
+    assert query.map(stores) == expected
+    assert query.map([]) == []
+
+    # Chaining on a prepared query gives a zombie Teddy again.
+    chained = query.apply(_value * 100)
+    assert (
+        chained.compile()(stores[1]) == teddy(stores[1]).iterations[:].test_metrics.accuracy.apply(_value * 100).result
+    )
+    assert teddy(double_list).pipe(_teddy[:].compile()[0]).result == [1, 3]
+
+    with pytest.raises(RuntimeError):
+        _teddy.apply(lambda value: 1 / value).compile()(0)
@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from teddy import teddy, KeyedSequence
+from teddy import coroutines
+
+
+class Service:
+    """Counts how many calls are in flight at the same time."""
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+
+    async def lookup(self, value):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return None if value % 5 == 0 else value * 10
+
+
+def test_amap_values():
+    service = Service()
+    query = teddy(list(range(100))).amap_values(service.lookup, concurrency=8)
+    expected = KeyedSequence((i, i * 10) for i in range(100) if i % 5)
+    assert asyncio.run(query.aresult) == expected
+    assert service.max_active == 8
+    # Without a running event loop, `result` works too.
+    assert query.result == expected
+
+
+def test_aapply():
+    service = Service()
+    query = teddy(dict(a=1, b=2, c=5))[:].aapply(service.lookup)
+
+    async def main():
+        # Other tasks keep running on the loop while the chain is computed.
+        result, _ = await asyncio.gather(query.aresult, asyncio.sleep(0.01))
+        return result
+
+    assert asyncio.run(main()) == KeyedSequence(a=10, b=20)
+    assert service.max_active == 3
+    assert asyncio.run(teddy(3).aapply(service.lookup).aresult) == 30
+
+
+def test_errors():
+    async def fail(value):
+        raise KeyError(value)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(teddy([1, 2]).amap_values(fail).aresult)
+    with pytest.raises(ValueError):
+        coroutines.CoroutineExecutor(0)
@@ -50,3 +50,61 @@ def test_constructors():
     assert KeyedSequence({1: 2, 2: 3}) == {1: 2, 2: 3}
     assert KeyedSequence(((1, 2), (2, 3))) == {1: 2, 2: 3}
     assert KeyedSequence(zip((1, 2), (2, 3))) == {1: 2, 2: 3}
+
+
+def test_duplicate_keys():
+    ks = KeyedSequence(((1, 2), (3, 4), (1, 5)))
+    assert ks == {1: 5, 3: 4}
+    assert tuple(ks.keys()) == (1, 3)
+
+
+def test_lazy_index():
+    ks = KeyedSequence(((1, 2), (3, 4)))
+    assert ks._index is None
+    assert list(ks) == [2, 4]
+    assert ks._index is None
+
+    assert ks.get(3) == 4
+    assert ks.get(5, "default") == "default"
+    assert ks[1] == 2
+    assert 3 in ks.keys()
+    assert 5 not in ks.keys()
+    assert ks._index == {1: 0, 3: 1}
+
+
+def test_reversed():
+    ks = KeyedSequence(((1, 2), (3, 4)))
+    assert tuple(reversed(ks).items()) == ((3, 4), (1, 2))
+    assert reversed(ks)[1] == 2
+
+
+def test_range_keys():
+    ks = KeyedSequence(enumerate("abc"))
+    assert ks._keys == range(3)
+    assert ks[2] == "c"
+    assert ks.get(3) is None
+    assert ks.get(-1) is None
+    assert ks[True] == "b"
+    assert 1 in ks.keys()
+    assert 3 not in ks.keys()
+    assert ks == {0: "a", 1: "b", 2: "c"}
+    assert ks == KeyedSequence(keys=(0, 1, 2), values="abc")
+    assert hash(ks) == hash(KeyedSequence(keys=(0, 1, 2), values="abc"))
+
+    assert KeyedSequence(((1, "a"), (2, "b")))._keys == range(1, 3)
+    assert KeyedSequence(((0, "a"), (2, "b")))._keys == (0, 2)
+    assert KeyedSequence(((False, "a"), (True, "b")))._keys == (False, True)
+    assert tuple(KeyedSequence(((0, "a"), (True, "b"))).keys()) == (0, True)
+    assert KeyedSequence(((0, "a"), (2, "b"), (1, "c")))._keys == (0, 2, 1)
+    assert KeyedSequence(((0, "a"), (1.0, "b")))._keys == (0, 1.0)
+
+
+def test_direct_constructors():
+    ks = KeyedSequence(enumerate("abc", 5))
+    assert ks._keys == range(5, 8)
+    assert ks == {5: "a", 6: "b", 7: "c"}
+    assert KeyedSequence(enumerate(())) == {}
+
+    ks = KeyedSequence(values="abc")
+    assert ks._keys == range(3)
+    assert ks == KeyedSequence(enumerate("abc"))
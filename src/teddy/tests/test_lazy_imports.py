@@ -0,0 +1,17 @@
+import os
+import subprocess
+import sys
+
+import teddy
+
+
+def test_import_defers_heavy_modules():
+    script = (
+        "import sys, teddy; "
+        "print([m for m in ('prettyprinter', 'numpy', 'asyncio') if m in sys.modules]); "
+        "print(repr(teddy.KeyedSequence(a=1))); "
+        "print('prettyprinter' in sys.modules)"
+    )
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(teddy.__file__)))
+    output = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True, env=env).stdout
+    assert output.splitlines() == ["[]", "KeyedSequence(('a', 1))", "True"]
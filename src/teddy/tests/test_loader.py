@@ -0,0 +1,88 @@
+import json
+import os
+
+import pytest
+
+from teddy import teddy, _teddy, _key, _value
+from teddy import loader
+
+swapi_path = os.path.join(os.path.dirname(__file__), "..", "..", "..", "data", "swapi.json")
+with open(swapi_path) as f:
+    swapi = json.load(f)
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        _teddy.people[:].name,
+        _teddy.films[:]["title", "url"],
+        _teddy.people[0].films,
+        _teddy.people[-1].name,
+        _teddy.people[_key < 3][:],
+        _teddy.people.map_keys(_value["name"]),
+        _teddy.people[:].name.compile(),
+        _teddy,
+    ],
+)
+def test_load_json(query):
+    assert teddy(teddy.load_json(swapi_path, query)).pipe(query).result == teddy(swapi).pipe(query).result
+
+
+def test_projection():
+    people_names = loader.loads_json(json.dumps(swapi), _teddy.people[:].name)
+    assert list(people_names) == ["people"]
+    assert people_names["people"][0] == dict(name="Luke Skywalker")
+
+    both = loader.loads_json(json.dumps(swapi), _teddy.people[:].name, _teddy.films[1].title)
+    assert list(both) == ["people", "films"]
+    # Array indices are preserved.
+    assert both["films"][0] is None
+    assert both["films"][1] == dict(title=swapi["films"][1]["title"])
+
+    assert loader.projection() is loader.SKIP
+    assert loader.projection(_teddy.people.apply(len)) == loader.Projection({"people": loader.FULL}, loader.SKIP)
+
+
+def test_skip():
+    document = '{"a": [1, [2, "]"], {"b": 3}], "b": {"c": "[{"}, "c": [ ], "d": 4}'
+    assert loader.loads_json(document, _teddy.d) == dict(d=4)
+    assert loader.loads_json(document, _teddy.a[1][1]) == dict(a=[None, [None, "]"], None])
+    assert loader.loads_json(document) is None
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        {"a": list(range(1000)), "b": [{"c": "d"}] * 100},
+        ["x" * 300] * 100,
+        [{"\u00e9": "\u2603" * 10}] * 200,
+        [{"a": "]}"}, "[{"] * 200,
+        ['\\"]', "\u00e9", {"a": ["\u2603"]}] * 200,
+    ],
+)
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+def test_skip_large(value, ensure_ascii):
+    # Values this large are skipped by their brackets.
+    document = json.dumps(dict(a=value, b=[value, 2], c=1), ensure_ascii=ensure_ascii)
+    assert loader.loads_json(document, _teddy.c) == dict(c=1)
+    assert loader.loads_json(document, _teddy.b[1]) == dict(b=[None, 2])
+    with pytest.raises(json.JSONDecodeError):
+        loader.loads_json(document[: len(document) // 2], _teddy.c)
+
+
+def test_invalid_json():
+    with pytest.raises(json.JSONDecodeError):
+        loader.loads_json('{"a": [1, 2}', _teddy.b)
+    with pytest.raises(json.JSONDecodeError):
+        loader.loads_json('{"a": 1} 2', _teddy.a)
+    with pytest.raises(json.JSONDecodeError):
+        loader.loads_json('{"a": nope}', _teddy.a)
+
+
+@pytest.mark.parametrize("document", ["", "   ", '{"a": 1', '{"a": [1, 2', '{"a": [1, 2], "b"', "[", '{"a": {"b": 1}'])
+@pytest.mark.parametrize("query", [_teddy.a, _teddy.b, _teddy.a[:], _teddy])
+def test_truncated_json(document, query):
+    with pytest.raises(json.JSONDecodeError):
+        loader.loads_json(document, query)
+    with pytest.raises(json.JSONDecodeError):
+        loader.loads_json(document)
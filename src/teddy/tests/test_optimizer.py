@@ -0,0 +1,79 @@
+import pytest
+
+from teddy import teddy, _key, _value, KeyedSequence
+from teddy import compiler
+from teddy import popo
+
+runs = {
+    f"run{i}": dict(group=i % 2, args=dict(lr=0.1 * i, seed=i), metrics=dict(loss=[i, i + 1, i + 2], acc=1 - 0.1 * i))
+    for i in range(5)
+}
+
+
+def mapper_types(t):
+    return [outer.mapper_type[0] for outer in t._stages]
+
+
+queries = [
+    lambda t: t[:].args.seed,
+    lambda t: t[:][{"s": "args", "m": "metrics"}].acc,
+    lambda t: t[:][("args", "metrics")].seed,
+    lambda t: t[:].metrics.loss.map_values(_value * 2).map_values(lambda key, value: key + value),
+    lambda t: t.map_values(_value["args"]).map_values(lambda value: value["seed"] or None),
+    lambda t: t.map_values(_value["metrics"]["acc"])[_key != "run2"],
+    lambda t: t.map_values(lambda key, value: value["args"]["lr"] if key != "run1" else None)[_key > "run0"],
+    lambda t: t.map_values(_value["args"])[_key != "run3"].lr,
+    lambda t: t[:].metrics.loss.map_values(_value + 1)[:],
+    lambda t: t[:].metrics.loss.map_values(_value + 1)[lambda key: key > 0],
+    lambda t: t[:].metrics.loss.map_values(_value + 1)[_value > 3],
+    lambda t: t.groupby("group")[:],
+]
+
+
+@pytest.mark.parametrize("query", queries)
+def test_optimize(query):
+    expected = query(teddy(runs)).result
+    optimized = query(teddy(runs)).optimize()
+    assert optimized.result == expected
+    assert optimized.compile().result == expected
+    # Further chaining works as usual.
+    assert optimized.apply(str).result == query(teddy(runs)).apply(str).result
+    assert optimized.count() == query(teddy(runs)).count()
+
+
+def test_rules():
+    t = teddy(runs)
+    assert mapper_types(t[:].args.seed.optimize()) == ["mapper_all", "getitem_path"]
+    assert mapper_types(t.map_values(_value).map_values(_value).map_values(_value).optimize()) == ["map_values"]
+    assert mapper_types(t.map_values(_value)[_key != "run1"].args.optimize()) == [
+        "map_values",
+        "mapper_all",
+        "getitem_atom",
+    ]
+    assert mapper_types(t.map_values(_value)[_key != "run1"].optimize()) == ["without_trailing_all"]
+    # Filters on values, lookups after fan-outs and parallel map_values are kept.
+    assert mapper_types(t.map_values(_value)[_value].optimize()) == ["map_values", "getitem_filter"]
+    assert mapper_types(t[[0, 1]].x.optimize()) == ["getitem_list", "getitem_atom"]
+    assert mapper_types(t[{"a": slice(None)}].x.optimize()) == ["getitem_dict", "getitem_atom"]
+
+    dict_lookup = t[:][{"s": "args"}].seed.optimize()._stages[-1]
+    assert [(name, sub_outer.mapper_args) for name, sub_outer in dict_lookup.sub_outers] == [("s", ("args", "seed"))]
+
+
+def test_key_filter_pushdown():
+    calls = []
+
+    def expensive(value):
+        calls.append(value)
+        return value
+
+    result = teddy(list(range(100))).map_values(expensive)[_key < 3].optimize().result
+    assert result == KeyedSequence(enumerate(range(3)))
+    assert calls == [0, 1, 2]
+
+
+def test_getitem_path_columns():
+    records = dict(items=[dict(a=dict(b=i)) for i in range(3)])
+    assert teddy(records, columnar=True).items[:].a.b.optimize().result == KeyedSequence(enumerate(range(3)))
+    assert popo.getitem_path(("a", "b"))(popo.id_func)(dict(a=dict(b=1))) == 1
+    assert compiler.compile_stages([popo.getitem_path(("a", "b"))])(popo.id_func)(dict(a=None)) is None
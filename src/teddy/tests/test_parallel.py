@@ -0,0 +1,68 @@
+import concurrent.futures
+import pickle
+
+import pytest
+
+from teddy import teddy, _value, KeyedSequence
+from teddy import popo
+
+
+def square(value):
+    return value * value
+
+
+def mod3_or_none(value):
+    return value % 3 or None
+
+
+def label(key, value):
+    return f"{key}:{value}"
+
+
+@pytest.fixture(scope="module")
+def process_pool():
+    with concurrent.futures.ProcessPoolExecutor(max_workers=2) as executor:
+        yield executor
+
+
+def test_picklable_lambda():
+    f = popo.picklable(popo.to_lambda(abs(_value - 1) ** 2 + _value % 2))
+    assert pickle.loads(pickle.dumps(f))(3) == f(3) == 5
+    assert popo.picklable(square) is square
+
+
+@pytest.mark.parametrize("compile", [False, True])
+def test_map_values(process_pool, compile):
+    data = dict(a=list(range(20)), b=dict(x=3, z=-1))
+
+    def query(**kwargs):
+        query = teddy(data)[:].map_values(square, **kwargs)
+        return query.compile() if compile else query
+
+    assert query(executor=process_pool, chunksize=4).result == query().result
+    assert teddy(data).b.map_values(label, executor=process_pool).result == dict(x="x:3", z="z:-1")
+    assert teddy(data).a.map_values(mod3_or_none, executor=process_pool).result == KeyedSequence(
+        (i, i % 3) for i in range(20) if i % 3
+    )
+    assert teddy([]).map_values(square, executor=process_pool).result is None
+
+
+@pytest.mark.parametrize("compile", [False, True])
+def test_apply(process_pool, compile):
+    values = list(range(50))
+    query = teddy(values)[:].apply(square, executor=process_pool, chunksize=8).apply(_value + 1)
+    assert (query.compile() if compile else query).result == KeyedSequence((i, i * i + 1) for i in values)
+    query = teddy(values)[:].apply(mod3_or_none, executor=process_pool)
+    assert (query.compile() if compile else query).result == KeyedSequence((i, i % 3) for i in values if i % 3)
+    assert teddy(values).apply(sum, executor=process_pool).result == sum(values)
+    assert teddy(dict(a=[1, 2], b=[3])).apply(len, executor=process_pool).result == 2
+
+
+def test_thread_pool():
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        assert teddy(range(10))[:].apply(square, executor=executor).result == KeyedSequence(
+            (i, i * i) for i in range(10)
+        )
+        assert teddy(range(10)).map_values(lambda value: -value, executor=executor).result == KeyedSequence(
+            (i, -i) for i in range(10)
+        )
@@ -0,0 +1,52 @@
+import io
+
+from teddy import teddy, _value, KeyedSequence
+from teddy import profiling
+
+runs = [dict(name=f"run{i}", losses=[i, i + 1, i + 2]) for i in range(4)]
+
+
+def test_profile():
+    query = teddy(runs)[_value["name"] != "run0"].losses.map_values(_value * 2).apply(sum)
+    out = io.StringIO()
+    profile = query.profile(file=out)
+
+    assert profile.result == query.result
+    expressions = [stats.expression for stats in profile.stages]
+    assert expressions == [
+        "[lambda _, value: (value['name'] != 'run0')]",
+        ".losses",
+        ".map_values(lambda value: (value * 2))",
+        ".apply(sum)",
+    ]
+    assert [(stats.calls, stats.items_out) for stats in profile.stages] == [(1, 3), (3, 3), (3, 3), (3, 3)]
+    for stats in profile.stages:
+        assert 0 <= stats.self_time <= stats.cumulative_time <= profile.total_time
+    assert sum(stats.self_time for stats in profile.stages) <= profile.total_time
+
+    report = out.getvalue()
+    assert all(expression in report for expression in expressions)
+    assert report.startswith("stage")
+
+
+def test_profile_compiled():
+    profile = teddy(runs)[:].name.compile().profile(report=False)
+    assert profile.result == KeyedSequence(enumerate(run["name"] for run in runs))
+    assert [stats.expression for stats in profile.stages] == ["[:].name.compile()"]
+
+
+def test_profile_default_file(capsys):
+    # The report goes to the current `sys.stdout` (which capsys replaces).
+    teddy(runs)[:].name.profile()
+    assert capsys.readouterr().out.startswith("stage")
+
+
+def test_describe():
+    query = teddy()[{"a": 0}].groupby("id").zip().pipe(_value, _value).map(lambda key, value: (value, key))
+    assert [profiling.describe(outer) for outer in query._stages] == [
+        "[{'a': 0}]",
+        ".groupby('id')",
+        ".zip()",
+        ".pipe(<2 exprs>)",
+        ".map(test_describe.<locals>.<lambda>)",
+    ]
@@ -0,0 +1,40 @@
+import dataclasses
+import typing
+
+from teddy import schema
+
+
+@dataclasses.dataclass
+class DC2:
+    a: int
+    b: typing.List[str]
+
+
+def test_infer_schema():
+    assert schema.infer_schema(1) is int
+    assert schema.infer_schema([1, 2]) == schema.SequenceSchema(list, int)
+    assert schema.infer_schema([]) == schema.SequenceSchema(list, schema.NOTHING)
+    assert schema.infer_schema([1, "a"]) == schema.SequenceSchema(list, schema.ANY)
+    assert schema.infer_schema([dict(a=1), dict(b="x"), None]) == schema.SequenceSchema(
+        list, schema.DictSchema(dict, dict(a=int, b=str), schema.NOTHING)
+    )
+    assert schema.infer_schema(DC2(1, ["x"])) == schema.DataclassSchema(
+        DC2, dict(a=int, b=schema.SequenceSchema(list, str))
+    )
+
+
+def test_canonical_schema():
+    assert schema.canonical_schema(dict(a=[int])) == schema.DictSchema(
+        dict, dict(a=schema.SequenceSchema(list, int)), schema.NOTHING
+    )
+    assert schema.canonical_schema(typing.Dict[str, float]) == schema.DictSchema(dict, {}, float)
+    assert schema.canonical_schema(DC2) == schema.infer_schema(DC2(1, ["x"]))
+
+
+def test_schema_get():
+    dict_schema = schema.canonical_schema(dict(a=[int], b=str))
+    assert schema.schema_get(dict_schema, "a") == schema.SequenceSchema(list, int)
+    assert schema.schema_get(dict_schema, "c") is schema.NOTHING
+    assert schema.schema_get(schema.schema_get(dict_schema, "a"), 0) is int
+    assert schema.element_schema(schema.canonical_schema(dict(a=[int], b=[int]))) == schema.SequenceSchema(list, int)
+    assert schema.element_schema(dict_schema) is schema.ANY
@@ -0,0 +1,66 @@
+import io
+import json
+
+from teddy import teddy, _value, KeyedSequence
+
+
+records = [dict(step=0, loss=0.5), dict(step=1, loss=0.25, note="x"), dict(step=2, loss=0.125)]
+
+
+def write_jsonl(path, records):
+    with open(path, "w") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+        # Empty lines are skipped.
+        f.write("\n")
+
+
+def test_stream_path(tmp_path):
+    path = tmp_path / "log.jsonl"
+    write_jsonl(path, records)
+
+    losses = teddy.stream(path).loss
+    assert losses.result == teddy(records)[:].loss.result
+    # Paths can be consumed more than once.
+    assert list(losses) == [0.5, 0.25, 0.125]
+    assert teddy.stream(str(path)).note.result == KeyedSequence({1: "x"})
+
+
+def test_stream_file_object():
+    lines = io.StringIO("".join(json.dumps(record) + "\n" for record in records))
+    assert teddy.stream(lines)["step", "loss"].result == teddy(records)[:]["step", "loss"].result
+
+
+def test_stream_iterator():
+    consumed = []
+
+    def generate():
+        for record in records:
+            consumed.append(record["step"])
+            yield record
+
+    items = teddy.stream(generate()).loss.apply(_value * 2).items()
+    # Records are pushed through the query as they arrive.
+    assert next(items) == (0, 1.0)
+    assert consumed == [0]
+    assert list(items) == [(1, 0.5), (2, 0.25)]
+
+
+def test_stream_buffer():
+    stream = teddy.stream(iter(dict(step=step) for step in range(1000))).step
+    assert stream.buffer(2) == KeyedSequence({998: 998, 999: 999})
+    assert teddy.stream([]).step.buffer(2) is None
+
+
+def test_stream_compile():
+    assert teddy.stream(records).loss.compile().result == teddy(records)[:].loss.result
+
+
+def test_stream_methods():
+    # Teddy methods are chained onto the query (instead of being looked up as keys).
+    upper_keys = teddy.stream(records).index_by(lambda key, value: key.upper())
+    assert upper_keys.LOSS.result == teddy(records)[:].loss.result
+    assert teddy.stream(records).to_attr_map().result == teddy(records)[:].to_attr_map().result
+    assert teddy.stream(records).optimize().step.result == teddy(records)[:].step.result
+    # Attributes that are no Teddy methods are keys.
+    assert teddy.stream(records).note.result == KeyedSequence({1: "x"})
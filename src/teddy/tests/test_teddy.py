@@ -1,10 +1,10 @@
 import dataclasses
 import pytest
 
+from teddy import popo
 from teddy import teddy, lit, _key, _value, KeyedSequence, _teddy, all_keys
 from implicit_lambda import logical_or
 
-
 simple_list = [1, 2, 3, 4]
 simple_dict = dict(a=1, b=2)
 double_list = [[1, 2], [3, 4, 5]]
@@ -187,7 +187,199 @@ def test_groupby():
         123: [dict(name="John"), dict(nickname="Joe"), dict(surname="Miller")],
         456: [dict(name="Jack"), dict(nickname="Dick"), dict(surname="Black")],
     }
+    # Groups don't need to be contiguous.
+    assert teddy([dict(id=1), dict(id=2), dict(id=1)]).groupby("id")[:][:].id.result == {
+        1: KeyedSequence({0: 1, 2: 1}),
+        2: KeyedSequence({1: 2}),
+    }
 
 
 def test_attr_map():
     assert teddy(a=1, b=2, c=3).to_attr_map().result == dict(a=1, b=2, c=3)
+
+
+def test_cached():
+    calls = []
+
+    def count(value):
+        calls.append(value)
+        return value
+
+    data = dict(a=[1, 2])
+    cached_a = teddy(data, cache=True).apply(count).a
+    cached = cached_a[:]
+    assert cached.result == [1, 2]
+    assert list(cached) == [1, 2]
+    repr(cached)
+    assert len(calls) == 1
+
+    # Teddys chained from a cached Teddy cache their own results (and start from its result).
+    first = cached_a[_value > 1]
+    assert first.result == {1: 2}
+    assert first.result == {1: 2}
+    assert len(calls) == 1
+
+    data["a"].append(3)
+    assert cached.result == [1, 2]
+    first.invalidate()
+    assert cached.result == [1, 2, 3]
+    assert first.result == {1: 2, 2: 3}
+    assert len(calls) == 2
+
+
+def test_cached_source_is_iterated_once():
+    class Records(list):
+        iterations = 0
+
+        def __iter__(self):
+            Records.iterations += 1
+            return super().__iter__()
+
+    records = Records(dict(step=i, loss=i / 10) for i in range(5))
+    losses = teddy(records, cache=True).map_values(_value["loss"])
+    assert losses[_value > 0.2].result == {3: 0.3, 4: 0.4}
+    assert losses[:].result == [0.0, 0.1, 0.2, 0.3, 0.4]
+    assert losses[0].result == 0.0
+    assert losses.sum() == pytest.approx(1.0)
+    assert Records.iterations == 1
+
+    # Fan-outs can't continue from their results, so their chains are evaluated from the source.
+    records_steps = teddy(records, cache=True)[:].step
+    assert records_steps.result == [0, 1, 2, 3, 4]
+    assert records_steps.result == [0, 1, 2, 3, 4]
+    assert teddy(records, cache=True)[:]["loss"].result == [0.0, 0.1, 0.2, 0.3, 0.4]
+    assert Records.iterations == 3
+
+    # A None result is no result (the chain is evaluated again).
+    is_none = lambda value: value is None
+    assert teddy(dict(a=1), cache=True).a.apply(lambda value: None).apply(is_none).result is True
+    assert teddy(dict(a=1), cache=True).b.apply(is_none).result is None
+
+
+def test_uncached():
+    calls = []
+    uncached = teddy(simple_list).apply(lambda v: calls.append(v) or v)
+    uncached.result
+    uncached.result
+    assert len(calls) == 2
+    assert teddy(simple_list).cached()[0].result == 1
+
+
+@dataclasses.dataclass(frozen=True)
+class DC3:
+    a: int
+    b: int
+
+
+def test_schema():
+    data = dict(items=[dict(a=[1, 2]), dict(a=[3], b=DC3(4, 5))])
+    for teddy_schema in (True, dict(items=[dict(a=[int])]), None):
+        t = teddy(data, schema=teddy_schema)
+        assert t["items"][:].a[0].result == [1, 3]
+        assert t["items"][:].a[-1].result == [2, 3]
+        assert t["items"][:].a[1].result == {0: 2}
+        assert t["items"][:].b.a.result == {1: 4}
+        assert t["items"][:]["a", "b"].result == {0: dict(a=[1, 2]), 1: dict(a=[3], b=DC3(4, 5))}
+
+
+def test_schema_mismatch():
+    t = teddy(dict(items=[dict(a=1)]), schema=dict(items=[[int]]))
+    assert t["items"][:].a.result == [1]
+    assert t["items"][:][0].result is None
+    assert teddy(KeyedSequence(a=1), schema=dict(a=int)).a.result == 1
+
+
+def test_index_by():
+    calls = []
+
+    def get_url(value):
+        calls.append(value)
+        return value["url"]
+
+    films = [dict(url="a", title="A"), dict(url="b", title="B")]
+    by_url = teddy(dict(films=films)).films.index_by(get_url)
+    assert by_url.result == dict(a=films[0], b=films[1])
+    assert by_url["b"].title.result == "B"
+    assert by_url["a", "b"].title.result == dict(a="A", b="B")
+    assert by_url[_key == "a"].result == dict(a=films[0])
+    assert by_url[_key == "c"].result is None
+    assert by_url[_key != "a"].result == dict(b=films[1])
+    assert len(calls) == 2
+
+    # Appends are picked up, other changes need a reindex.
+    films.append(dict(url="c", title="C"))
+    assert by_url["c"].title.result == "C"
+    assert len(calls) == 5
+    films[2] = dict(url="d", title="D")
+    assert by_url["d"].result is None
+    by_url.reindex()
+    assert by_url["d"].title.result == "D"
+    assert len(calls) == 8
+
+    # The results are only kept for a bounded number of items.
+    records = [[i] for i in range(popo._MAX_INDEXED_ITEMS + 10)]
+    indexed = teddy(records)[:].index_by(_value * 10)
+    assert indexed.result == [{i * 10: i} for i in range(len(records))]
+    assert len(indexed._stages[-1].indexes) <= popo._MAX_INDEXED_ITEMS
+
+    # The index is per item.
+    assert teddy(double_list)[:].index_by(_value * 10)[30].result == {1: 3}
+    assert teddy(double_list)[:].index_by(lambda key, value: key).compile().result == [[1, 2], [3, 4, 5]]
+
+
+def test_join():
+    people = [dict(name="Luke", films=["a", "b"]), dict(name="Leia", films=["b"]), dict(name="Han", films=[])]
+    films = [dict(url="b", title="B"), dict(url="a", title="A"), dict(url="c", title="C")]
+
+    joined = teddy.join(teddy(people), teddy(films), on=("films", "url"))
+    assert joined[:].right.title.result == {(0, 0): "B", (0, 1): "A", (1, 0): "B"}
+    assert joined.result[(0, 1)] == dict(left=people[0], right=films[1])
+
+    # The smaller side is on the left now (so we build the hash table on it), but the order stays the same.
+    assert teddy.join(people[:2], films, on=("films", "url"))[:].right.title.result == {
+        (0, 0): "B",
+        (0, 1): "A",
+        (1, 0): "B",
+    }
+
+    left_joined = teddy.join(people, films, on=(_value["films"], "url"), how="left")
+    assert left_joined[:].left.name.result == {(0, 0): "Luke", (0, 1): "Luke", (1, 0): "Leia", (2, None): "Han"}
+    assert left_joined.result[(2, None)] == dict(left=people[2], right=None)
+
+    assert teddy.join(dict(x=dict(id=1)), [dict(id=1), dict(id=2)], on="id").result == {
+        ("x", 0): dict(left=dict(id=1), right=dict(id=1))
+    }
+    with pytest.raises(ValueError):
+        teddy.join(people, films, on="url", how="outer")
+
+    # Like everywhere else, empty results are None.
+    assert teddy.join(people, films, on=("name", "url")).result is None
+    assert teddy.join(people, films, on=("name", "url"))[:].left.result is None
+    assert teddy.join([], films, on="url", how="left").result is None
+    assert teddy.join(people[2:], films, on=("films", "url"), how="left").result == {
+        (0, None): dict(left=people[2], right=None)
+    }
+
+
+def test_compiled_lambdas_are_cached():
+    f = popo.compile_lambda(_value["a"] > 0.5, popo._FILTER_ARGS)
+    assert popo.compile_lambda(_value["a"] > 0.5, popo._FILTER_ARGS) is f
+    assert popo.compile_lambda(_value["a"] > 0.5, popo._VALUE_ARGS) is not f
+    assert popo.compile_lambda(_value["b"] > 0.5, popo._FILTER_ARGS) is not f
+    # Equal, but different literals.
+    assert popo.compile_lambda(_value == 1, popo._VALUE_ARGS) is not popo.compile_lambda(
+        _value == True, popo._VALUE_ARGS
+    )
+    assert popo.compile_lambda(_value + 0.0, popo._VALUE_ARGS)(1) == 1.0
+    assert repr(popo.compile_lambda(_value * -0.0, popo._VALUE_ARGS)(1)) == "-0.0"
+
+    assert teddy(simple_dict)[_value > 1].result == dict(b=2)
+    assert teddy(simple_dict)[_value > 1].result == dict(b=2)
+    assert teddy(simple_dict)[_value > 0].result == simple_dict
+
+
+def test_getargcount():
+    assert popo.getargcount(lambda x: x) == 1
+    assert popo.getargcount(lambda x, y=1, *args, z, **kwargs: x) == 4
+    assert popo.getargcount(len) == 1
+    assert popo.getargcount(popo.compile_lambda(_key, popo._FILTER_ARGS)) == 1
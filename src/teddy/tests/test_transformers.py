@@ -1,5 +1,12 @@
+import collections
+import os
+import subprocess
+import sys
+
 import pytest
 import dataclasses
+from teddy import accessors
+from teddy import popo
 from teddy import transformers
 from teddy import keyed_sequence
 
@@ -127,3 +134,102 @@ def test_call_values():
 
 def test_drop_nones():
     assert tuple(transformers.drop_nones(((0, None), (1, 2), (2, None)))) == ((1, 2),)
+
+
+def test_can_kv():
+    assert transformers.can_kv([1])
+    assert transformers.can_kv(dict(a=1))
+    assert transformers.can_kv(keyed_sequence.KeyedSequence(a=1))
+    assert not transformers.can_kv(1)
+
+    with pytest.raises(NotImplementedError):
+        transformers.to_kv(1)
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Registrations are global, so tests register on a copy (and drop the accessors resolved from it)."""
+    monkeypatch.setattr(accessors, "_registered", dict(accessors._registered))
+    yield
+    accessors.resolved.clear()
+
+
+def test_register_record(registry):
+    Point = collections.namedtuple("Point", ["x", "y"])
+
+    class Slots:
+        __slots__ = ("a", "b")
+
+        def __init__(self):
+            self.a = 1
+            self.b = 2
+
+    class SubSlots(Slots):
+        __slots__ = ()
+
+    assert tuple(transformers.to_kv(Point(1, 2))) == ((0, 1), (1, 2))
+    assert not transformers.can_kv(Slots())
+
+    accessors.register_record(Point)
+    accessors.register_record(Slots)
+
+    assert tuple(transformers.to_kv(Point(1, 2))) == (("x", 1), ("y", 2))
+    assert tuple(transformers.to_kv(SubSlots())) == (("a", 1), ("b", 2))
+    assert popo.key_getter("y")(Point(1, 2)) == 2
+    assert popo.key_getter("c")(Slots()) is None
+    assert popo.key_getter("b")(SubSlots()) == 2
+
+
+def test_fused_steps():
+    generator = popo.FiniteGenerator.wrap(dict(a=1, b=None, c=3, d=4, e=5))
+    chain = (
+        generator.filter_keys(lambda key: key != "e")
+        .map_values(lambda value: None if value == 3 else value)
+        .drop_nones()
+        .map(lambda key, value: (key.upper(), value * 10))
+        .filter(lambda key, value: value > 5)
+    )
+    assert chain.result == keyed_sequence.KeyedSequence(A=10, D=40)
+    assert list(chain) == [("A", 10), ("D", 40)]
+    # The steps can be run again.
+    assert chain.result == keyed_sequence.KeyedSequence(A=10, D=40)
+
+
+def test_fused_steps_duplicate_keys():
+    chain = popo.FiniteGenerator.wrap([1, 2, 3]).map_keys(lambda key: key % 2)
+    # Later values win, like for `dict`.
+    assert list(chain) == [(0, 1), (1, 2), (0, 3)]
+    assert chain.result == keyed_sequence.KeyedSequence({0: 3, 1: 2}) == keyed_sequence.KeyedSequence(list(chain))
+
+
+def test_unfused_steps():
+    # Transformers without a step are applied to the pairs between the fused loops.
+    def reverse(pairs):
+        return reversed(list(pairs))
+
+    chain = popo.FiniteGenerator.wrap([1, 2, 3, 4]).filter_values(lambda value: value != 2).adapt(reverse)
+    assert list(chain) == [(3, 4), (2, 3), (0, 1)]
+    assert chain.result == keyed_sequence.KeyedSequence({3: 4, 2: 3, 0: 1})
+    chain = chain.map_values(lambda value: value * 10).adapt(reverse).drop_nones()
+    assert list(chain) == [(0, 10), (2, 30), (3, 40)]
+    assert chain.result == keyed_sequence.KeyedSequence({0: 10, 2: 30, 3: 40})
+
+
+def test_fused_steps_optimized():
+    # Without `__debug__` (`python -O`), inner functions are not tagged, which must not change any results.
+    script = (
+        "from teddy import popo, teddy, _value; "
+        "chain = popo.FiniteGenerator.wrap(dict(a=1, b=None, c=3)).drop_nones().map_values(lambda value: value * 2); "
+        "print(list(chain), chain.result); "
+        "print(popo.FiniteGenerator.wrap([1, 2]).adapt(lambda pairs: reversed(list(pairs))).map_keys(str).result); "
+        "print(teddy([dict(a=1), dict(a=None), dict(a=3)])[:].a.result); "
+        "print(teddy(dict(x=[1, 2, 3], y=[4]))[:][_value > 1].result)"
+    )
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(popo.__file__)))
+    outputs = [
+        subprocess.run([sys.executable, *flags, "-c", script], check=True, capture_output=True, text=True, env=env)
+        for flags in ([], ["-O"])
+    ]
+    assert outputs[0].stdout == outputs[1].stdout
+    assert outputs[0].stdout.splitlines()[0] == "[('a', 2), ('c', 6)] KeyedSequence(('a', 2), ('c', 6))"
+
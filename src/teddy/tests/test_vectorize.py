@@ -0,0 +1,91 @@
+import pytest
+
+from implicit_lambda import _, literal, logical_and, logical_not, logical_or
+
+from teddy import teddy, _key, _value, KeyedSequence
+from teddy import vectorize
+
+numpy = pytest.importorskip("numpy")
+
+losses = [(i * 37 % 101) / 100 for i in range(200)]
+steps = list(range(200))
+
+
+@pytest.mark.parametrize(
+    ("expr", "predicate"),
+    [
+        (_value > 0.5, lambda key, value: value > 0.5),
+        (_key % 2 == 0, lambda key, value: key % 2 == 0),
+        (_ >= 150, lambda key, value: key >= 150),
+        (1 - _value < 0.25, lambda key, value: 1 - value < 0.25),
+        (abs(_value - 0.5) * 2 <= literal(0.5), lambda key, value: abs(value - 0.5) * 2 <= 0.5),
+        ((_value > 0.2) & (_key < 100), lambda key, value: value > 0.2 and key < 100),
+        (logical_and(_value > 0.2, _key < 100), lambda key, value: value > 0.2 and key < 100),
+        (logical_or(_value > 0.9, logical_not(_key)), lambda key, value: value > 0.9 or not key),
+        (_value, lambda key, value: value),
+    ],
+)
+def test_vectorized_filter(expr, predicate):
+    expected = KeyedSequence((key, value) for key, value in enumerate(losses) if predicate(key, value))
+    assert teddy(losses)[expr].result == (expected or None)
+    assert teddy(numpy.array(losses))[expr].result == (expected or None)
+
+
+def test_vectorized_int_filter():
+    result = teddy(steps)[_value // 7 == 3].result
+    assert result == KeyedSequence((step, step) for step in steps if step // 7 == 3)
+    assert all(type(value) is int for value in result.values())
+    assert len(teddy(steps)[_value % 2 == 1].result) == 100
+
+
+def test_int_overflow():
+    # int64 arithmetic would wrap around, so these use the Python path.
+    numbers = list(range(1, 50))
+    assert len(teddy(numbers)[_value ** 20 > 0].result) == 49
+    assert len(teddy(numbers)[_value * 2 ** 62 > 0].result) == 49
+    assert len(teddy(numbers)[-(_value - 2 ** 63) > 0].result) == 49
+    assert len(teddy(numbers)[(_key + 1) ** 30 > 0].result) == 49
+    # Small results stay vectorized and exact.
+    assert teddy(numbers)[_value ** 2 > 2000].result == KeyedSequence((i - 1, i) for i in numbers if i ** 2 > 2000)
+
+
+def test_int_precision():
+    # NumPy would compare these in float64, so they use the Python path.
+    numbers = [2 ** 60 + 1] * 40
+    assert len(teddy(numbers)[_value > 2.0 ** 60].result) == 40
+    assert teddy(numbers)[_value == 2.0 ** 60].result is None
+    assert len(teddy(numbers)[_value - 1 == 2.0 ** 60].result) == 40
+    records = [dict(time=number) for number in numbers]
+    assert len(teddy(records, columnar=True)[_value["time"] > 2.0 ** 60].result) == 40
+    # Small integers stay vectorized and exact.
+    assert len(teddy(steps)[_value > 99.5].result) == 100
+
+
+def test_not_vectorizable():
+    assert vectorize.mask_function(_value > 0.5, ("_", "value")) is not None
+    assert vectorize.mask_function(_value.real > 0.5, ("_", "value")) is None
+    assert vectorize.mask_function(_value > "a", ("_", "value")) is None
+    assert vectorize.mask_function(logical_and(_value, _key) + 1, ("key", "value")) is None
+    assert vectorize.mask_function(_value @ _value, ("_", "value")) is None
+
+
+def test_fallback():
+    # Division by zero can't be vectorized, so we use the Python path (and its error).
+    with pytest.raises(RuntimeError):
+        teddy(steps)[1 / _key > 0.5].result
+    assert teddy(steps)[1 / (_key + 1) > 0.1].result == KeyedSequence(enumerate(range(9)))
+
+    mixed = [0.5, 1] * 20
+    assert teddy(mixed)[_value > 0.75].result == KeyedSequence((i, 1) for i in range(1, 40, 2))
+
+
+def test_vectorized_columns():
+    records = [dict(step=step, loss=loss, meta=dict(tag=str(step))) for step, loss in zip(steps, losses)]
+    columnar_records = teddy(records, columnar=True)
+    plain_records = teddy(records)
+    for query in (
+        lambda t: t[_value["loss"] > 0.9],
+        lambda t: t[_value["loss"] > 0.9].meta.tag,
+        lambda t: t[(_value["step"] % 3 == 0) & (_key > 10)].loss,
+    ):
+        assert query(columnar_records).result == query(plain_records).result
@@ -0,0 +1,135 @@
+import tracemalloc
+
+import pytest
+
+from teddy import teddy, _value, KeyedSequence
+
+
+def make_store(num_iterations):
+    return dict(
+        name="run",
+        iterations=[dict(step=i, test_metrics=dict(accuracy=i / 10, nll=1 / (i + 1))) for i in range(num_iterations)],
+    )
+
+
+def append_iteration(store):
+    i = len(store["iterations"])
+    store["iterations"].append(dict(step=i, test_metrics=dict(accuracy=i / 10, nll=1 / (i + 1))))
+
+
+def test_view_matches_teddy():
+    store = make_store(3)
+    view = teddy.view(store).iterations[:].test_metrics
+    for _ in range(3):
+        assert view.result == teddy(store).iterations[:].test_metrics.result
+        append_iteration(store)
+    assert view.result == teddy(store).iterations[:].test_metrics.result
+
+
+def test_view_methods():
+    store = make_store(3)
+    view = teddy.view(store).iterations[:].test_metrics.index_by(lambda key, value: key.upper()).ACCURACY
+    append_iteration(store)
+    assert view.result == teddy(store).iterations[:].test_metrics.accuracy.result
+    assert teddy.view(store).iterations[:].to_attr_map().result[3].step == 3
+
+
+def test_view_only_processes_new_records():
+    store = make_store(3)
+    calls = []
+
+    def accuracy(metrics):
+        calls.append(metrics)
+        return metrics["accuracy"]
+
+    view = teddy.view(store).iterations[:].test_metrics.apply(accuracy)
+    assert view.result == [0.0, 0.1, 0.2]
+    assert len(calls) == 3
+    assert view.result == [0.0, 0.1, 0.2]
+    assert len(calls) == 3
+
+    append_iteration(store)
+    append_iteration(store)
+    assert view.result == [0.0, 0.1, 0.2, 0.3, 0.4]
+    assert len(calls) == 5
+
+
+def test_view_drops_nones():
+    store = make_store(4)
+    odd = lambda step: step if step % 2 == 1 else None
+    view = teddy.view(store).iterations[:].step.apply(odd)
+    assert view.result == KeyedSequence({1: 1, 3: 3})
+    append_iteration(store)
+    append_iteration(store)
+    assert view.result == KeyedSequence({1: 1, 3: 3, 5: 5})
+    assert view.result == teddy(store).iterations[:].step.apply(odd).result
+
+
+def test_view_results_share_the_cache():
+    records = [dict(step=i) for i in range(3)]
+    view = teddy.view(records)[:].step.apply(lambda step: step if step != 1 else None)
+    old_result = view.result
+    records.append(dict(step=3))
+    # Earlier results don't change when the view grows.
+    assert old_result == KeyedSequence({0: 0, 2: 2})
+    assert view.result == KeyedSequence({0: 0, 2: 2, 3: 3}) == {0: 0, 2: 2, 3: 3}
+    assert view.result[3] == 3 and view.result.get(1) is None
+    assert hash(view.result) == hash(KeyedSequence({0: 0, 2: 2, 3: 3}))
+    assert list(reversed(view.result).items()) == [(3, 3), (2, 2), (0, 0)]
+
+
+def test_view_refresh_doesnt_copy():
+    records = [dict(step=i) for i in range(100000)]
+    view = teddy.view(records)[:].step
+    view.refresh()
+    tracemalloc.start()
+    try:
+        records.append(dict(step=len(records)))
+        view.refresh()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # Copying the values into a tuple would allocate 800 KB.
+    assert peak < 10000
+    assert len(view.result) == 100001
+
+
+def test_view_starts_over_on_new_list():
+    store = make_store(3)
+    view = teddy.view(store).iterations[:].step
+    assert view.result == [0, 1, 2]
+    store["iterations"] = store["iterations"][:1]
+    assert view.result == [0]
+    store["iterations"] = make_store(2)["iterations"]
+    assert view.result == [0, 1]
+
+
+def test_view_empty_and_aggregations():
+    records = []
+    view = teddy.view(records)[:].loss
+    assert view.result is None
+    assert list(view.items()) == []
+    records.extend([dict(loss=1.0), dict(loss=3.0)])
+    assert view.sum() == 4.0
+    records.append(dict(loss=5.0))
+    assert view.mean() == 3.0
+    assert list(view.items()) == [(0, 1.0), (1, 3.0), (2, 5.0)]
+
+
+def test_view_fan_out_aggregations():
+    records = [dict(losses=[1, 2, 3]), dict(losses=[4, 5])]
+    view = teddy.view(records)[:].losses[:]
+    assert view.count() == teddy(records)[:].losses[:].count() == 5
+    assert view.sum() == teddy(records)[:].losses[:].sum() == 15
+    assert view.max() == 5
+    records.append(dict(losses=[6]))
+    assert view.count() == 6
+    with pytest.raises(RuntimeError):
+        teddy.view(records)[:].losses.sum()
+
+
+def test_view_source_errors():
+    with pytest.raises(TypeError):
+        teddy.view(make_store(1))[_value > 0]
+    with pytest.raises(KeyError):
+        teddy.view(make_store(1)).epochs[:].result
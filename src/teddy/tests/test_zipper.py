@@ -0,0 +1,53 @@
+from teddy import teddy
+from teddy.keyed_sequence import KeyedSequence
+from teddy.zipper import Zipper, RelaxedZipper
+
+
+def test_zipper_shared_keys_in_first_branch_order():
+    zipper = Zipper(dict(a={"x": 1, "y": 2, "z": 3}, b={"z": 6, "y": 5}).items())
+    assert list(zipper) == ["y", "z"]
+    assert len(zipper) == 2
+    assert zipper["z"] == KeyedSequence(a=3, b=6)
+    assert zipper["x"] is None
+    assert "x" not in zipper
+
+
+def test_zipper_sequences_and_keyed_sequences():
+    zipper = Zipper(dict(a=[1, 2, 3], b=(4, 5), c=KeyedSequence([(1, 7), (0, 8)])).items())
+    assert list(zipper) == [0, 1]
+    assert zipper[1] == KeyedSequence(a=2, b=5, c=7)
+    assert zipper[2] is None
+    assert zipper[-1] is None
+
+
+def test_zipper_keeps_none_values():
+    zipper = Zipper(dict(a={0: None}, b={0: 1}).items())
+    assert list(zipper) == [0]
+    assert zipper[0] == KeyedSequence(a=None, b=1)
+
+
+def test_zipper_does_not_copy_branches():
+    data = dict(a={0: 1}, b={0: 2})
+    zipper = Zipper(data.items())
+    data["a"][1] = 3
+    data["b"][1] = 4
+    assert zipper[1] == KeyedSequence(a=3, b=4)
+
+
+def test_relaxed_zipper():
+    zipper = RelaxedZipper(dict(a={"x": 1, "y": 2}, b={"z": 6, "y": 5}).items())
+    assert list(zipper) == ["x", "y", "z"]
+    assert zipper["x"] == KeyedSequence(a=1)
+    assert zipper["y"] == KeyedSequence(a=2, b=5)
+    assert zipper["w"] is None
+
+    assert list(RelaxedZipper(dict(a=[1], b=[2, 3]).items())) == [0, 1]
+
+
+def test_zip_relaxed():
+    assert teddy(dict(a={0: 1, 1: 2}, b={2: 3, 0: 5})).zip(relaxed=True).result == {
+        0: dict(a=1, b=5),
+        1: dict(a=2),
+        2: dict(b=3),
+    }
+    assert teddy(dict(a=[1, 2], b=[3])).zip().result == [dict(a=1, b=3)]
@@ -1,10 +1,7 @@
-import dataclasses
-from collections import abc
-from teddy.keyed_sequence import KeyedSequence
+from teddy import accessors
 
 
-def dataclass_to_kv(obj):
-    return ((field.name, getattr(obj, field.name)) for field in dataclasses.fields(obj))
+dataclass_to_kv = accessors.dataclass_to_kv
 
 
 def get_dict_or_slots(obj):
@@ -20,51 +17,41 @@ def attrs_to_kv(obj):
 
 
 def can_kv(obj: object):
-    if isinstance(obj, abc.Sequence):
-        return True
-    if isinstance(obj, abc.Mapping):
-        return True
-    if isinstance(obj, KeyedSequence):
-        return True
-    if dataclasses.is_dataclass(obj):
-        return True
-    return False
+    return accessors.accessor(type(obj)).to_kv is not accessors.no_kv
 
 
 def to_kv(obj: object):
-    if isinstance(obj, abc.Sequence):
-        return ((i, value) for i, value in enumerate(obj))
-    if isinstance(obj, abc.Mapping):
-        return ((key, value) for key, value in obj.items())
-    if isinstance(obj, KeyedSequence):
-        return obj.items()
-    if dataclasses.is_dataclass(obj):
-        return ((key, value) for key, value in dataclass_to_kv(obj))
-    raise NotImplementedError(type(obj))
+    return accessors.accessor(type(obj)).to_kv(obj)
+
+
+def _step(kind, f, transformer):
+    # Lets `popo.FiniteGenerator` fuse consecutive transformers into a single loop.
+    transformer.step = (kind, f)
+    return transformer
 
 
 def filter_keys(f):
-    return lambda generator: ((key, value) for key, value in generator if f(key))
+    return _step("filter_keys", f, lambda generator: ((key, value) for key, value in generator if f(key)))
 
 
 def filter_values(f):
-    return lambda generator: ((key, value) for key, value in generator if f(value))
+    return _step("filter_values", f, lambda generator: ((key, value) for key, value in generator if f(value)))
 
 
 def filter(f):
-    return lambda generator: ((key, value) for key, value in generator if f(key, value))
+    return _step("filter", f, lambda generator: ((key, value) for key, value in generator if f(key, value)))
 
 
 def map_keys(f):
-    return lambda generator: ((f(key), value) for key, value in generator)
+    return _step("map_keys", f, lambda generator: ((f(key), value) for key, value in generator))
 
 
 def map_values(f):
-    return lambda generator: ((key, f(value)) for key, value in generator)
+    return _step("map_values", f, lambda generator: ((key, f(value)) for key, value in generator))
 
 
 def map_kv(f):
-    return lambda generator: (f(key, value) for key, value in generator)
+    return _step("map_kv", f, lambda generator: (f(key, value) for key, value in generator))
 
 
 def call_values(*args):
@@ -72,8 +59,11 @@ def call_values(*args):
         for key, value in generator:
             yield key, value(*args)
 
-    return inner
+    return _step("call_values", args, inner)
 
 
 def drop_nones(generator):
     return ((key, value) for key, value in generator if value is not None)
+
+
+drop_nones.step = ("drop_nones", None)
@@ -0,0 +1,271 @@
+"""Vectorized evaluation of implicit-lambda filters.
+
+`popo.getitem_filter` applies its filter to one key-value pair at a time. For implicit lambdas that only use
+arithmetic and comparisons on numbers (like `_value > 0.5` or `_key % 2 == 0`), `mask_function` lowers the
+expression tree into NumPy operations that compute a boolean mask for all elements at once.
+
+The vectorized path is taken for NumPy arrays, homogeneous lists of ints or floats, and `columnar.Columns`
+(where `_value["field"]` fetches a numeric column). Whenever the vectorized evaluation fails (e.g. because of a
+division by zero), the filter falls back to the Python path, which has the exact semantics.
+
+NumPy integer arithmetic wraps around on overflow, unlike Python ints. Integer results of ops that can overflow
+are checked against the same op in float64, and the filter falls back to the Python path if they get close to
+the int64 range. Likewise, NumPy compares integers with floats in float64, unlike Python, so we fall back for
+integers that float64 can't represent exactly.
+"""
+import operator
+import typing
+
+from implicit_lambda import get_expr
+from implicit_lambda.details import expression
+
+from teddy import columnar
+from teddy import keyed_sequence
+
+
+# Lists that are shorter than this are filtered in Python (converting them is not worth it).
+MIN_LIST_SIZE = 32
+
+_unsupported_ops = {
+    expression.ArithmeticOps.MATMUL,
+    expression.ArithmeticOps.RMATMUL,
+    expression.ArithmeticOps.DIVMOD,
+    expression.ArithmeticOps.RDIVMOD,
+}
+# Reflected ops (`__radd__` etc.) have their arguments swapped.
+_reflected_ops = {op for op in expression.ArithmeticOps if "{1}" in op.value.template}
+
+_binary_ops = {
+    op: getattr(operator, "__" + op.value.name[3:] if op in _reflected_ops else op.value.name)
+    for op in (*expression.ComparisonOps, *expression.ArithmeticOps)
+    if op not in _unsupported_ops
+}
+_binary_ops[expression.OptionalArgOps.POW_2] = operator.pow
+
+_unary_ops = {
+    expression.UnaryOps.POSITIVE: operator.pos,
+    expression.UnaryOps.NEGATIVE: operator.neg,
+    expression.UnaryOps.ABS: operator.abs,
+}
+
+# Ops whose integer results can leave the int64 range (even for int64 arguments).
+_overflowing_ops = {
+    expression.ArithmeticOps.ADD,
+    expression.ArithmeticOps.SUB,
+    expression.ArithmeticOps.MUL,
+    expression.ArithmeticOps.FLOORDIV,
+    expression.ArithmeticOps.LSHIFT,
+    expression.ArithmeticOps.RADD,
+    expression.ArithmeticOps.RSUB,
+    expression.ArithmeticOps.RMUL,
+    expression.ArithmeticOps.RFLOORDIV,
+    expression.ArithmeticOps.RPOW,
+    expression.ArithmeticOps.RLSHIFT,
+    expression.OptionalArgOps.POW_2,
+    expression.UnaryOps.NEGATIVE,
+    expression.UnaryOps.ABS,
+}
+
+# Integer results with a float64 magnitude below this are exact (with plenty of margin for rounding).
+_INT_BOUND = 2.0 ** 62
+
+_comparison_ops = set(expression.ComparisonOps)
+
+# Integers with a magnitude below this are exact in float64.
+_FLOAT_INT_BOUND = 2.0 ** 53
+
+_logical_ops = {expression.SpecialOps.LOGICAL_AND, expression.SpecialOps.LOGICAL_OR, expression.SpecialOps.LOGICAL_NOT}
+
+_number_types = (int, float, bool)
+
+
+class NotVectorizable(Exception):
+    pass
+
+
+def _literal(value):
+    if type(value) not in _number_types:
+        raise NotVectorizable(value)
+    return lambda keys, values: value
+
+
+def _check_overflow(op):
+    """Wraps `op` so that integer results which might have wrapped around raise NotVectorizable."""
+
+    def checked_op(*args):
+        result = op(*args)
+        if getattr(result, "dtype", None) is not None and result.dtype.kind in "iu":
+            numpy = columnar.import_numpy()
+            bound = op(*(numpy.asarray(arg, dtype=numpy.float64) for arg in args))
+            if not (numpy.abs(bound) < _INT_BOUND).all():
+                raise NotVectorizable(op)
+        return result
+
+    return checked_op
+
+
+def _check_precision(op):
+    """Wraps the comparison `op` so that comparing integers with floats raises NotVectorizable if that isn't exact."""
+
+    def checked_op(*args):
+        numpy = columnar.import_numpy()
+        args = [numpy.asarray(arg) for arg in args]
+        kinds = {arg.dtype.kind for arg in args}
+        if "f" in kinds and ("i" in kinds or "u" in kinds):
+            for arg in args:
+                if arg.dtype.kind in "iu" and not (numpy.abs(arg.astype(numpy.float64)) < _FLOAT_INT_BOUND).all():
+                    raise NotVectorizable(op)
+        return op(*args)
+
+    return checked_op
+
+
+def _lower(expr, arg_names: tuple, truth_value: bool):
+    """Returns `evaluate(keys, values)` for `expr`.
+
+    `truth_value` is True if only the truth value of the result matters (for `and`, `or` and `not`).
+    """
+    if isinstance(expr, expression.LiteralExpression):
+        return _literal(expr.literal)
+
+    if not isinstance(expr, expression.Expression):
+        return _literal(expr)
+
+    if isinstance(expr, expression.ArgsAccessor):
+        if expr.name not in arg_names:
+            raise NotVectorizable(expr)
+        if arg_names.index(expr.name) == 0:
+            return lambda keys, values: keys
+        return lambda keys, values: _numeric_values(values)
+
+    if isinstance(expr, expression.AccessorExpression):
+        if expr.op is not expression.AccessorOps.GET_ITEM or not isinstance(expr.target, expression.ArgsAccessor):
+            raise NotVectorizable(expr)
+        if expr.target.name not in arg_names or arg_names.index(expr.target.name) != 1:
+            raise NotVectorizable(expr)
+        field = expr.key.literal if isinstance(expr.key, expression.LiteralExpression) else expr.key
+        if isinstance(field, expression.Expression):
+            raise NotVectorizable(expr)
+        return lambda keys, values: _numeric_column(values, field)
+
+    if not isinstance(expr, expression.OpExpression):
+        raise NotVectorizable(expr)
+
+    op = expr.op
+    if op in _logical_ops:
+        if not truth_value:
+            # `a and b` returns one of its arguments in Python, not a boolean.
+            raise NotVectorizable(expr)
+        arg0 = _lower(expr.arg0, arg_names, truth_value=True)
+        # (NumPy is only imported when the mask is computed.)
+        numpy = columnar.import_numpy
+        if op is expression.SpecialOps.LOGICAL_NOT:
+            return lambda keys, values: numpy().logical_not(arg0(keys, values))
+        arg1 = _lower(expr.arg1, arg_names, truth_value=True)
+        if op is expression.SpecialOps.LOGICAL_AND:
+            return lambda keys, values: numpy().logical_and(arg0(keys, values), arg1(keys, values))
+        return lambda keys, values: numpy().logical_or(arg0(keys, values), arg1(keys, values))
+
+    if op in _unary_ops:
+        unary_op = _unary_ops[op]
+        if op in _overflowing_ops:
+            unary_op = _check_overflow(unary_op)
+        arg0 = _lower(expr.arg0, arg_names, truth_value=False)
+        return lambda keys, values: unary_op(arg0(keys, values))
+
+    if op in _binary_ops:
+        binary_op = _binary_ops[op]
+        if op in _overflowing_ops:
+            binary_op = _check_overflow(binary_op)
+        elif op in _comparison_ops:
+            binary_op = _check_precision(binary_op)
+        arg0 = _lower(expr.arg0, arg_names, truth_value=False)
+        arg1 = _lower(expr.arg1, arg_names, truth_value=False)
+        if op in _reflected_ops:
+            arg0, arg1 = arg1, arg0
+        return lambda keys, values: binary_op(arg0(keys, values), arg1(keys, values))
+
+    raise NotVectorizable(expr)
+
+
+def mask_function(dsl, arg_names: tuple) -> typing.Optional[typing.Callable]:
+    """Returns `mask(keys, values)` that evaluates the implicit lambda `dsl` on all elements at once.
+
+    `arg_names` are the arguments of the compiled lambda (`to_lambda(dsl).args`): the first one is the key and the
+    second one (if any) the value. Returns None if `dsl` cannot be vectorized (or NumPy is not installed).
+    """
+    if not columnar.has_numpy():
+        return None
+    try:
+        evaluate = _lower(get_expr(dsl), tuple(arg_names), truth_value=True)
+    except NotVectorizable:
+        return None
+
+    def mask(keys, values):
+        numpy = columnar.import_numpy()
+        with numpy.errstate(all="raise"):
+            result = numpy.asarray(evaluate(keys, values))
+        if result.dtype.kind not in "biuf":
+            raise NotVectorizable(result.dtype)
+        return numpy.broadcast_to(result.astype(bool, copy=False), keys.shape)
+
+    return mask
+
+
+def _numeric_values(values):
+    if not columnar.is_array(values) or values.dtype.kind not in "biuf":
+        raise NotVectorizable(type(values))
+    return values
+
+
+def _numeric_column(values, field):
+    if type(values) is not columnar.Columns:
+        raise NotVectorizable(type(values))
+    return _numeric_values(values.column(field))
+
+
+def as_array(item):
+    """Returns `item` as an array (or `Columns`) for vectorized filtering or None if that isn't worth it."""
+    item_type = type(item)
+    if item_type is columnar.Columns:
+        return item
+    if columnar.is_array(item):
+        return item if item.ndim == 1 else None
+    if item_type is list and len(item) >= MIN_LIST_SIZE:
+        value_types = set(map(type, item))
+        # NOTE: we only use exact types so that converting back with `tolist` gives the same values.
+        try:
+            if value_types == {float}:
+                numpy = columnar.import_numpy()
+                return numpy.array(item, dtype=numpy.float64)
+            if value_types == {int}:
+                numpy = columnar.import_numpy()
+                return numpy.array(item, dtype=numpy.int64)
+        except OverflowError:
+            pass
+    return None
+
+
+def select(array, mask):
+    """Returns the positions of the elements of `array` that pass `mask` or None if the mask cannot be computed."""
+    numpy = columnar.import_numpy()
+    keys = numpy.arange(len(array))
+    try:
+        return numpy.flatnonzero(mask(keys, array))
+    except (NotVectorizable, ArithmeticError, TypeError, ValueError):
+        return None
+
+
+def filter_array(array, indices, mapper, identity):
+    """Returns the elements of `array` at `indices` (from `select`) with continuation `mapper`."""
+    keys = indices.tolist()
+    if type(array) is columnar.Columns:
+        return columnar.map_all(array.take(indices), mapper, identity, keys)
+    aggregate = getattr(mapper, "aggregate", None)
+    if aggregate is not None:
+        return aggregate(array[indices])
+    values = array[indices].tolist()
+    if mapper is identity:
+        # Numbers are never None.
+        return keyed_sequence.KeyedSequence(keys=keys, values=values) or None
+    return columnar.map_values(keys, values, mapper, identity)
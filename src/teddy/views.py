@@ -0,0 +1,165 @@
+"""Incremental views of growing sources.
+
+Our training jobs append a record to a list after every step (like `store["iterations"]` in `data/laaos_data.py`).
+`teddy.view(store).iterations[:].test_metrics` behaves like `teddy(store).iterations[:].test_metrics`, but it
+remembers how many records of the list it has seen: every `result` only runs the query over the records that were
+appended since the last one and extends the cached result. A dashboard that refreshes after every step thus stays
+cheap late in a run.
+
+The lookups before `[:]` select the list and are resolved again on every refresh. If they lead to a different list
+(or the list got shorter), the view starts over. Records that are changed in place after they have been seen are not
+picked up.
+"""
+from collections import abc
+import dataclasses
+import itertools
+import typing
+
+from teddy import accessors
+from teddy import dsl
+from teddy import interface
+from teddy import streaming
+from teddy.keyed_sequence import KeyedSequence
+
+
+class _Cache:
+    __slots__ = ("records", "seen", "keys", "values", "result")
+
+    def __init__(self):
+        self.reset(None)
+
+    def reset(self, records):
+        self.records = records
+        # Number of records that have been run through the query.
+        self.seen = 0
+        # Indices and results of the records whose result is not None.
+        self.keys = []
+        self.values = []
+        self.result = None
+
+
+class _Prefix(abc.Sequence):
+    """The first `len(items)` items of a list that is only appended to (so it doesn't change when the list grows).
+
+    Lets the results of a view share the lists of its cache instead of copying them into tuples on every refresh.
+    """
+
+    __slots__ = ("_items", "_length")
+
+    def __init__(self, items: list):
+        self._items = items
+        self._length = len(items)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if type(index) is slice:
+            return tuple(self)[index]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        return self._items[index]
+
+    def __iter__(self):
+        return itertools.islice(self._items, self._length)
+
+    def __eq__(self, other):
+        if isinstance(other, (tuple, _Prefix)):
+            return len(other) == self._length and all(a is b or a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+
+@dataclasses.dataclass(frozen=True)
+class View(streaming.Stream):
+    """A stream over a list that only processes new records (see the module docstring).
+
+    `_records()` returns the list itself.
+    """
+
+    _cache: _Cache = dataclasses.field(default_factory=_Cache, compare=False, repr=False)
+
+    def _chain(self, query):
+        # A different query needs its own cache.
+        return dataclasses.replace(self, _query=query, _cache=_Cache())
+
+    def refresh(self):
+        """Runs the query over the records appended since the last refresh and returns the result."""
+        records = self._records()
+        cache = self._cache
+        if records is not cache.records or len(records) < cache.seen:
+            cache.reset(records)
+
+        num_records = len(records)
+        if num_records > cache.seen:
+            mapper = self._query.iterable(dsl.id_func)
+            keys = cache.keys
+            values = cache.values
+            for index in range(cache.seen, num_records):
+                result = mapper(records[index])
+                if result is not None:
+                    keys.append(index)
+                    values.append(result)
+            cache.seen = num_records
+            cache.result = None
+
+        if cache.result is None and cache.values:
+            # All records had a result in the common case, so the keys are just a range.
+            keys = range(len(cache.values)) if len(cache.values) == cache.seen else _Prefix(cache.keys)
+            # The lists of the cache are only appended to, so the result can share them.
+            cache.result = KeyedSequence._wrap(keys, _Prefix(cache.values))
+        return cache.result
+
+    def items(self):
+        result = self.refresh()
+        return iter(result.items()) if result is not None else iter(())
+
+    @property
+    def result(self):
+        return self.refresh()
+
+    # Aggregations use `Stream._aggregate`: they run the query with the aggregator as continuation over all records
+    # (so fan-outs after `[:]` are flattened like in `teddy(records)[:]`) and don't use the cache.
+
+
+@dataclasses.dataclass(frozen=True)
+class ViewSource:
+    """The lookups that select the list of a view (see `view`)."""
+
+    _data: object
+    _path: tuple = ()
+
+    def _records(self):
+        records = self._data
+        for key in self._path:
+            records = accessors.accessor(type(records)).get_key(records, key)
+            if records is None:
+                raise KeyError(f"{self._path} not found in view source!")
+        return records
+
+    def __getitem__(self, key):
+        if type(key) is slice and key == interface.all_keys:
+            return View(self._records)
+        if type(key) not in (str, int):
+            raise TypeError(f"Only key lookups and [:] are supported on view sources (not {key!r})!")
+        return dataclasses.replace(self, _path=self._path + (key,))
+
+    def __getattr__(self, key):
+        if key.startswith("__"):
+            raise AttributeError(key)
+        return self[key]
+
+
+def view(data: typing.Union[typing.MutableMapping, typing.MutableSequence]) -> ViewSource:
+    """Incrementally views the list in `data` that is selected by the following lookups and `[:]`.
+
+    `teddy.view(records)[:]` views `records` itself.
+    """
+    return ViewSource(data)
+
+
+dsl.teddy.view = view
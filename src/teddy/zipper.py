@@ -4,72 +4,168 @@ from teddy.keyed_sequence import KeyedSequence
 from teddy.transformers import to_kv
 
 
+class Branch:
+    """Uniform key access to a container without copying it.
+
+    Dicts (and other mappings) and `KeyedSequence`s are used as they are, sequences are keyed by their indices (so
+    membership is a range check). Other containers fall back to `KeyedSequence(to_kv(value))`.
+    """
+
+    __slots__ = ("value", "keys", "contains", "get")
+
+    def __init__(self, value):
+        value_type = type(value)
+        if value_type is dict or value_type is KeyedSequence or isinstance(value, abc.Mapping):
+            self.keys = value.keys()
+        elif value_type is list or value_type is tuple or (value_type is not str and isinstance(value, abc.Sequence)):
+            self.keys = range(len(value))
+        else:
+            value = KeyedSequence(to_kv(value))
+            self.keys = value.keys()
+        self.value = value
+        # (Bound methods, so the lookups don't go through `Branch`.)
+        self.contains = self.keys.__contains__
+        self.get = value.__getitem__
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __repr__(self):
+        return repr(self.value)
+
+
+def _shared_keys(branches: typing.Sequence[Branch]) -> list:
+    """The keys that all `branches` have, in the order of the first branch."""
+    if not branches:
+        return []
+    first = branches[0]
+    smallest = min(branches, key=len)
+    others = [branch for branch in branches if branch is not smallest]
+    shared = [key for key in smallest.keys if all(branch.contains(key) for branch in others)]
+    if smallest is first or len(shared) <= 1:
+        return shared
+    # Only a membership test per key of the first branch (no values are copied).
+    shared = set(shared)
+    return [key for key in first.keys if key in shared]
+
+
+def _all_keys(branches: typing.Sequence[Branch]) -> typing.Sequence:
+    """The keys that any of `branches` has, in the order they first appear."""
+    if all(type(branch.keys) is range for branch in branches):
+        return range(max((len(branch) for branch in branches), default=0))
+    keys = {}
+    for branch in branches:
+        keys.update(dict.fromkeys(branch.keys))
+    return list(keys)
+
+
+class ItemsView(abc.ItemsView):
+    """Items of a zipper (the keys are known to be valid, so the values are zipped without lookups)."""
+
+    __slots__ = ()
+
+    def __iter__(self):
+        zipper = self._mapping
+        for key in zipper.keys():
+            yield key, zipper._zip(key)
+
+
 class Zipper(abc.Mapping):
-    __slots__ = ("_branches", "_branch_keys")
-    _branches: typing.List[KeyedSequence]
-    _branch_keys: set
+    """The shared keys of the branches, mapped to the `KeyedSequence` of the branches' values for them."""
+
+    __slots__ = ("_names", "_branches", "_branch_keys")
+    _names: tuple
+    _branches: typing.Tuple[Branch, ...]
+    # Computed lazily (see `keys`).
+    _branch_keys: typing.Optional[typing.Sequence]
 
     def __init__(self, generator):
-        # TODO: KeyedSequence(to_kv(value)) is a slow operation. We only need uniform key access.
-        self._branches = tuple((key, KeyedSequence(to_kv(value))) for key, value in generator)
-        self._branch_keys = set.intersection(
-            *(set(branch_value.keys()) for branch_keys, branch_value in self._branches)
-        )
+        branches = tuple((key, Branch(value)) for key, value in generator)
+        self._names = tuple(key for key, branch in branches)
+        self._branches = tuple(branch for key, branch in branches)
+        self._branch_keys = None
+
+    def __contains__(self, key):
+        return bool(self._branches) and all(branch.contains(key) for branch in self._branches)
 
     def __getitem__(self, key):
-        if key not in self._branch_keys:
-            # raise KeyError(f"{key} not in shared keys {self._branch_keys}!")
+        if not self.__contains__(key):
+            # raise KeyError(f"{key} not in shared keys {self.keys()}!")
             return None
 
-        return KeyedSequence((branch_key, branch_value[key]) for branch_key, branch_value in self._branches)
+        return self._zip(key)
+
+    def _zip(self, key):
+        return KeyedSequence(keys=self._names, values=[branch.get(key) for branch in self._branches])
 
     def __len__(self):
-        return len(self._branch_keys)
+        return len(self.keys())
 
     def keys(self):
+        if self._branch_keys is None:
+            self._branch_keys = _shared_keys(self._branches)
         return self._branch_keys
 
     def __iter__(self):
-        # _branch_keys is a set and thus not ordered anymore.
-        # TODO: do we actually want an ordered set?
-        return iter(key for key in self._branches[0][1].keys() if key in self._branch_keys)
+        return iter(self.keys())
+
+    def items(self):
+        return ItemsView(self)
 
     def __hash__(self):
-        return hash(self._branches)
+        return hash(tuple(self.keys()))
 
     def __repr__(self):
-        return f"Zipper{repr(self._branches)}"
+        return f"Zipper{repr(tuple(zip(self._names, self._branches)))}"
 
 
 class RelaxedZipper(abc.Mapping):
-    __slots__ = ("_branches", "_branch_keys")
-    _branches: typing.List[KeyedSequence]
-    _branch_keys: set
+    """All keys of the branches, mapped to the `KeyedSequence` of the values of the branches that have them."""
+
+    __slots__ = ("_names", "_branches", "_branch_keys")
+    _names: tuple
+    _branches: typing.Tuple[Branch, ...]
+    # Computed lazily (see `keys`).
+    _branch_keys: typing.Optional[typing.Sequence]
 
     def __init__(self, generator):
-        # TODO: KeyedSequence(to_kv(value)) is a slow operation. We only need uniform key access.
-        self._branches = tuple((key, KeyedSequence(to_kv(value))) for key, value in generator)
-        self._branch_keys = set.union(*(set(branch_value.keys()) for branch_keys, branch_value in self._branches))
+        branches = tuple((key, Branch(value)) for key, value in generator)
+        self._names = tuple(key for key, branch in branches)
+        self._branches = tuple(branch for key, branch in branches)
+        self._branch_keys = None
+
+    def __contains__(self, key):
+        return any(branch.contains(key) for branch in self._branches)
 
     def __getitem__(self, key):
-        if key not in self._branch_keys:
-            # raise KeyError(f"{key} not in shared keys {self._branch_keys}!")
+        if not self.__contains__(key):
+            # raise KeyError(f"{key} not in any keys {self.keys()}!")
             return None
+
+        return self._zip(key)
+
+    def _zip(self, key):
+        branches = [(name, branch) for name, branch in zip(self._names, self._branches) if branch.contains(key)]
         return KeyedSequence(
-            (branch_key, branch_value[key]) for branch_key, branch_value in self._branches if key in branch_value
+            keys=[name for name, branch in branches], values=[branch.get(key) for name, branch in branches]
         )
 
     def __len__(self):
-        return len(self._branch_keys)
+        return len(self.keys())
 
     def keys(self):
+        if self._branch_keys is None:
+            self._branch_keys = _all_keys(self._branches)
         return self._branch_keys
 
     def __iter__(self):
-        return iter(self._branch_keys)
+        return iter(self.keys())
+
+    def items(self):
+        return ItemsView(self)
 
     def __hash__(self):
-        return hash(self._branches)
+        return hash(tuple(self.keys()))
 
     def __repr__(self):
-        return f"RelaxedZipper{repr(self._branches)}"
+        return f"RelaxedZipper{repr(tuple(zip(self._names, self._branches)))}"